@@ -37,14 +37,18 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'recipe.apps.RecipeConfig',
+    'benchmark.apps.BenchmarkConfig',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -88,6 +92,24 @@ DATABASES = {
     }
 }
 
+# Read replicas
+# DB_REPLICA_HOSTS lists replica hosts, separated by commas, that share the
+# primary's name and credentials. Safe requests read from a random replica
+# unless the client wrote within the last DATABASE_REPLICA_PIN_SECONDS.
+
+DATABASE_REPLICAS = []
+for host in filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')):
+    alias = f'replica{len(DATABASE_REPLICAS) + 1}'
+    DATABASES[alias] = dict(
+        DATABASES['default'], HOST=host, TEST={'MIRROR': 'default'}
+    )
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+DATABASE_REPLICA_PIN_SECONDS = int(
+    os.environ.get('DATABASE_REPLICA_PIN_SECONDS', 5)
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
@@ -107,6 +129,23 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# With PASSWORD_HASHING_WORKERS above 0, PBKDF2 hashes are computed in a pool
+# of that many threads per process, so login bursts can't take every CPU from
+# the rest of the API. Up to PASSWORD_HASHING_MAX_PENDING more wait for a
+# thread; beyond that login and signup answer 429.
+
+PASSWORD_HASHERS = [
+    'core.hashers.PooledPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+PASSWORD_HASHING_WORKERS = int(os.environ.get('PASSWORD_HASHING_WORKERS', 0))
+PASSWORD_HASHING_MAX_PENDING = int(
+    os.environ.get('PASSWORD_HASHING_MAX_PENDING', 8)
+)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/2.1/topics/i18n/
@@ -130,4 +169,132 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
-AUTH_USER_MODEL = 'core.User'
\ No newline at end of file
+
+# Uploads are served by core.media.serve_media. Behind nginx, set
+# MEDIA_ACCEL_REDIRECT_PREFIX to an internal location aliasing MEDIA_ROOT
+# (for example /protected-media/) so nginx sends the file; behind Apache or
+# lighttpd, set MEDIA_USE_SENDFILE to hand it over with X-Sendfile instead.
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get(
+    'MEDIA_ACCEL_REDIRECT_PREFIX', ''
+)
+MEDIA_USE_SENDFILE = os.environ.get('MEDIA_USE_SENDFILE', '') == '1'
+AUTH_USER_MODEL = 'core.User'
+
+
+# Django REST framework
+# JSON is rendered and parsed with orjson when it is installed, falling back
+# to the standard library otherwise.
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # Rates as <requests>/<sec|min|hour|day>; an empty value disables a
+    # scope. 'reads', 'writes' and 'upload-image' are per user across the
+    # recipe API.
+    'DEFAULT_THROTTLE_RATES': {
+        'reads': os.environ.get('API_THROTTLE_READS_RATE', '600/min') or None,
+        'writes': os.environ.get('API_THROTTLE_WRITES_RATE', '120/min') or None,
+        'upload-image':
+            os.environ.get('API_THROTTLE_UPLOAD_IMAGE_RATE', '20/min') or None,
+        'login-ip': os.environ.get('LOGIN_THROTTLE_IP_RATE', '30/min') or None,
+        'login-email':
+            os.environ.get('LOGIN_THROTTLE_EMAIL_RATE', '10/min') or None,
+        'signup-ip': os.environ.get('SIGNUP_THROTTLE_IP_RATE', '10/min') or None,
+    },
+    # Number of proxies in front of the app that append to X-Forwarded-For.
+    # Per address throttles key on the address the last of them saw, or on
+    # REMOTE_ADDR with none, so clients can't pick their own address.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+}
+
+# Cache holding throttle counters. Use a backend shared by all workers when
+# running more than one process, or each process gets its own allowance.
+THROTTLE_CACHE_ALIAS = 'default'
+
+
+# Recipe API pagination
+# Clients opt in with ?page_size= or ?cursor=, capped at the maximum below.
+
+RECIPE_API_PAGE_SIZE = int(os.environ.get('RECIPE_API_PAGE_SIZE', 50))
+RECIPE_API_MAX_PAGE_SIZE = int(os.environ.get('RECIPE_API_MAX_PAGE_SIZE', 500))
+
+# List and detail responses are built straight from `.values()` rows by the
+# serializers in recipe/fast.py; set to 0 to use the DRF serializers.
+RECIPE_API_FAST_SERIALIZERS = \
+    os.environ.get('RECIPE_API_FAST_SERIALIZERS', '1') == '1'
+
+# Text search configuration used to index and search recipes.
+RECIPE_SEARCH_CONFIG = 'english'
+
+# Cache holding per-user collection versions and rendered list responses.
+# Use a backend shared by all workers (not the per-process default) when
+# running more than one process.
+RECIPE_API_CACHE_ALIAS = 'default'
+RECIPE_API_CACHE_TIMEOUT = int(os.environ.get('RECIPE_API_CACHE_TIMEOUT', 300))
+
+# Largest list of recipes accepted by the bulk create endpoint.
+RECIPE_BULK_MAX_ITEMS = int(os.environ.get('RECIPE_BULK_MAX_ITEMS', 10000))
+
+# Recipes read from the database per round trip when exporting.
+RECIPE_EXPORT_CHUNK_SIZE = int(os.environ.get('RECIPE_EXPORT_CHUNK_SIZE', 2000))
+
+# Incremental sync (/api/sync)
+# Each sync re-reads changes from the last SYNC_OVERLAP_SECONDS before its
+# token to catch rows whose transaction committed late. Deletions are kept
+# for SYNC_TOMBSTONE_DAYS (`manage.py prune_tombstones`); clients with an
+# older token get a full sync.
+SYNC_OVERLAP_SECONDS = int(os.environ.get('SYNC_OVERLAP_SECONDS', 60))
+SYNC_TOMBSTONE_DAYS = int(os.environ.get('SYNC_TOMBSTONE_DAYS', 30))
+
+
+# Recipe images
+# Uploads are processed by `manage.py process_images`, which writes a resized
+# copy of every image for each variant below (longest side in pixels).
+
+RECIPE_IMAGE_VARIANTS = {
+    'thumbnail': 200,
+    'medium': 800,
+}
+RECIPE_IMAGE_VARIANT_FORMAT = 'WEBP'
+
+# Uploads are streamed to a temporary file and refused with a 413 past
+# RECIPE_IMAGE_MAX_BYTES. Images are checked from their header, so
+# decompression bombs are refused before any pixels are decoded.
+RECIPE_IMAGE_MAX_BYTES = int(
+    os.environ.get('RECIPE_IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.environ.get('RECIPE_IMAGE_MAX_PIXELS', 40000000)
+)
+RECIPE_IMAGE_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+
+# A failed image is retried up to three times, waiting
+# RECIPE_IMAGE_RETRY_SECONDS after the first failure and twice as long after
+# each one since.
+RECIPE_IMAGE_RETRY_SECONDS = int(
+    os.environ.get('RECIPE_IMAGE_RETRY_SECONDS', 30)
+)
+
+
+# Request metrics
+# Every response carries a Server-Timing header unless disabled, and requests
+# running more queries than the budget are logged (None disables logging).
+
+REQUEST_METRICS_SERVER_TIMING = True
+REQUEST_QUERY_BUDGET = int(os.environ.get('REQUEST_QUERY_BUDGET', 20))
+
+
+# Token authentication cache
+# Entries live in a per-process LRU unless TOKEN_AUTH_CACHE_ALIAS names a
+# cache from CACHES, in which case they are shared between workers.
+
+TOKEN_AUTH_CACHE_ALIAS = os.environ.get('TOKEN_AUTH_CACHE_ALIAS')
+TOKEN_AUTH_CACHE_SIZE = int(os.environ.get('TOKEN_AUTH_CACHE_SIZE', 10000))
+TOKEN_AUTH_CACHE_TIMEOUT = int(os.environ.get('TOKEN_AUTH_CACHE_TIMEOUT', 60))
@@ -0,0 +1,84 @@
+"""
+Production settings for app project.
+
+Run the app under gunicorn with these settings:
+
+    DJANGO_SETTINGS_MODULE=app.settings_production \
+        gunicorn -c gunicorn.conf.py app.wsgi
+
+Values that differ between deployments are read from the environment.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from app.settings import *  # noqa: F401,F403
+from app.settings import DATABASES
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.environ['ALLOWED_HOSTS'].split(',')
+
+
+# Database
+# Keep each thread's connection open between requests instead of connecting
+# per request. Every gunicorn thread holds its own connection to each
+# database, so the server needs up to WEB_CONCURRENCY * WEB_THREADS
+# connections per container on the primary and on every replica, which must
+# stay below PostgreSQL's max_connections.
+
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 300))
+
+
+# Caches
+# Workers are separate processes, so response caches, collection versions
+# and tokens have to live in a shared cache for invalidation to reach them.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.environ.get(
+            'MEMCACHED_LOCATION', 'memcached:11211'
+        ),
+    }
+}
+
+TOKEN_AUTH_CACHE_ALIAS = os.environ.get(
+    'TOKEN_AUTH_CACHE_ALIAS', 'default'
+)
+
+
+# Request metrics
+# Timings are still collected for /api/metrics, but not sent to clients.
+
+REQUEST_METRICS_SERVER_TIMING = os.environ.get(
+    'REQUEST_METRICS_SERVER_TIMING'
+) == '1'
+
+
+# Password hashing
+# Every login or signup waiting on the pool holds a request thread, so at
+# most half of each worker's WEB_THREADS (see gunicorn.conf.py) may be
+# hashing or waiting to. Anything beyond that answers 429 straight away and
+# the other threads stay free for the rest of the API.
+
+WEB_THREADS = int(os.environ.get('WEB_THREADS', 4))
+PASSWORD_HASHING_WORKERS = int(os.environ.get(
+    'PASSWORD_HASHING_WORKERS', min(2, WEB_THREADS // 2)
+))
+PASSWORD_HASHING_MAX_PENDING = int(os.environ.get(
+    'PASSWORD_HASHING_MAX_PENDING',
+    max(WEB_THREADS // 2 - PASSWORD_HASHING_WORKERS, 0)
+))
+if PASSWORD_HASHING_WORKERS > 0 and \
+        PASSWORD_HASHING_WORKERS + PASSWORD_HASHING_MAX_PENDING \
+        > WEB_THREADS // 2:
+    raise ImproperlyConfigured(
+        'PASSWORD_HASHING_WORKERS + PASSWORD_HASHING_MAX_PENDING must be '
+        'at most half of WEB_THREADS, or login storms can hold every '
+        'request thread.'
+    )
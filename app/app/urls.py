@@ -15,10 +15,21 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.conf.urls.static import static
 from django.conf import settings
+from core.media import serve_media
+from core.views import MetricsView, HealthView, ReadinessView
+from recipe.views import SyncView
 urlpatterns = [
     path('api/recipe', include('recipe.urls')),
+    path('api/sync', SyncView.as_view(), name='sync'),
+    path('api/metrics', MetricsView.as_view(), name='metrics'),
+    path('health/live', HealthView.as_view(), name='health-live'),
+    path('health/ready', ReadinessView.as_view(), name='health-ready'),
     path('admin/', admin.site.urls),
     path('api/', include('users.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path(
+        f'{settings.MEDIA_URL.lstrip("/")}<path:path>',
+        serve_media,
+        name='media'
+    ),
+]
@@ -0,0 +1,247 @@
+import io
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from urllib import error, request as urlrequest
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from benchmark.seed import WORDS
+from core.models import Tag, Ingredient, Recipe
+
+# Relative weight of each operation in the replayed traffic.
+DEFAULT_MIX = {
+    'list': 35,
+    'detail': 25,
+    'filter': 15,
+    'search': 5,
+    'create': 15,
+    'upload-image': 5,
+}
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(rank, 1) - 1]
+
+
+def server_timing_queries(header):
+    """Return the query count reported in a Server-Timing header"""
+    match = re.search(r'desc="(\d+) queries"', header or '')
+    return int(match.group(1)) if match else None
+
+
+def sample_jpeg():
+    """Return the bytes of a small JPEG to upload"""
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 480), 'orange').save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class LocalTransport:
+    """Send requests through Django's test client in this process
+
+    Query counts are read from the Server-Timing header, which covers the
+    primary and any replica the request read from.
+    """
+
+    def __init__(self, host):
+        self.client = Client(HTTP_HOST=host)
+
+    def send(self, method, path, token, payload=None, image=None):
+        headers = {'HTTP_AUTHORIZATION': f'Token {token}'}
+        if image is not None:
+            upload = SimpleUploadedFile('image.jpg', image, 'image/jpeg')
+            res = self.client.post(path, {'image': upload}, **headers)
+        elif payload is not None:
+            res = self.client.generic(
+                method, path, json.dumps(payload),
+                content_type='application/json', **headers
+            )
+        else:
+            res = self.client.generic(method, path, **headers)
+        return res.status_code, server_timing_queries(res.get('Server-Timing'))
+
+
+class HttpTransport:
+    """Send requests over HTTP to a running server
+
+    Query counts are read from the Server-Timing header when the server
+    sends one.
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def send(self, method, path, token, payload=None, image=None):
+        headers = {'Authorization': f'Token {token}'}
+        body = None
+        if image is not None:
+            boundary = uuid.uuid4().hex
+            headers['Content-Type'] = \
+                f'multipart/form-data; boundary={boundary}'
+            body = (
+                f'--{boundary}\r\n'
+                'Content-Disposition: form-data; name="image"; '
+                'filename="image.jpg"\r\n'
+                'Content-Type: image/jpeg\r\n\r\n'
+            ).encode() + image + f'\r\n--{boundary}--\r\n'.encode()
+        elif payload is not None:
+            headers['Content-Type'] = 'application/json'
+            body = json.dumps(payload).encode()
+
+        req = urlrequest.Request(
+            self.base_url + path, data=body, headers=headers, method=method
+        )
+        try:
+            with urlrequest.urlopen(req) as res:
+                res.read()
+                return res.status, server_timing_queries(
+                    res.headers.get('Server-Timing')
+                )
+        except error.HTTPError as exc:
+            return exc.code, server_timing_queries(
+                exc.headers.get('Server-Timing')
+            )
+
+
+class UserState:
+    """The ids a simulated client knows about for one user"""
+
+    def __init__(self, token):
+        self.token = token.key
+        user = token.user
+        self.recipe_ids = list(
+            Recipe.objects.filter(user=user).values_list('id', flat=True)
+            .order_by('-id')[:1000]
+        )
+        self.tag_ids = list(
+            Tag.objects.filter(user=user).values_list('id', flat=True)
+        )
+        self.ingredient_ids = list(
+            Ingredient.objects.filter(user=user).values_list('id', flat=True)
+        )
+
+
+def _build_request(op, state, rng, image):
+    """Return (method, path, payload, image) for an operation"""
+    list_url = reverse('recipe:recipe-list')
+    if op == 'list':
+        return 'GET', list_url + '?page_size=50', None, None
+    if op == 'detail':
+        recipe_id = rng.choice(state.recipe_ids)
+        return 'GET', reverse('recipe:recipe-detail', args=[recipe_id]), \
+            None, None
+    if op == 'filter':
+        count = min(2, len(state.tag_ids))
+        tags = ','.join(str(i) for i in rng.sample(state.tag_ids, count))
+        return 'GET', f'{list_url}?page_size=50&tags={tags}', None, None
+    if op == 'search':
+        return 'GET', f'{list_url}?page_size=50&search={rng.choice(WORDS)}', \
+            None, None
+    if op == 'create':
+        return 'POST', list_url, {
+            'title': 'Benchmark recipe',
+            'time_minutes': rng.randint(5, 120),
+            'price': '9.99',
+            'tags': rng.sample(state.tag_ids, min(3, len(state.tag_ids))),
+            'ingredients': rng.sample(
+                state.ingredient_ids, min(8, len(state.ingredient_ids))
+            ),
+        }, None
+    if op == 'upload-image':
+        recipe_id = rng.choice(state.recipe_ids)
+        return 'POST', reverse(
+            'recipe:recipe-upload-image', args=[recipe_id]
+        ), None, image
+    raise ValueError(f'Unknown operation {op}')
+
+
+def run(transport_factory, requests, threads=1, mix=None, seed=None):
+    """Replay a random mix of operations and return per-request samples
+
+    Each sample is a tuple of (operation, status, seconds, queries).
+    """
+    mix = mix or DEFAULT_MIX
+    states = [
+        UserState(token) for token in Token.objects.select_related('user')
+        .filter(user__email__startswith='benchmark-')
+    ]
+    if not states:
+        raise ValueError('No benchmark users, run seed_benchmark first')
+    image = sample_jpeg()
+    samples = []
+    lock = threading.Lock()
+
+    def worker(index, count):
+        rng = random.Random(None if seed is None else seed + index)
+        transport = transport_factory()
+        ops, weights = zip(*mix.items())
+        local = []
+        for _ in range(count):
+            state = rng.choice(states)
+            op = rng.choices(ops, weights)[0]
+            method, path, payload, upload = _build_request(
+                op, state, rng, image
+            )
+            start = time.perf_counter()
+            status, queries = transport.send(
+                method, path, state.token, payload, upload
+            )
+            local.append((op, status, time.perf_counter() - start, queries))
+        with lock:
+            samples.extend(local)
+        if threads > 1:
+            connections.close_all()
+
+    per_thread = [requests // threads] * threads
+    per_thread[0] += requests % threads
+    if threads == 1:
+        worker(0, per_thread[0])
+    else:
+        pool = [
+            threading.Thread(target=worker, args=(i, count))
+            for i, count in enumerate(per_thread)
+        ]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+    return samples
+
+
+def summarize(samples):
+    """Aggregate samples into per-operation latency and query statistics"""
+    by_op = defaultdict(list)
+    for sample in samples:
+        by_op[sample[0]].append(sample)
+
+    rows = []
+    for op in sorted(by_op):
+        ops = by_op[op]
+        seconds = [s[2] for s in ops]
+        queries = [s[3] for s in ops if s[3] is not None]
+        rows.append({
+            'operation': op,
+            'requests': len(ops),
+            'errors': sum(1 for s in ops if s[1] >= 400),
+            'p50_ms': percentile(seconds, 50) * 1000,
+            'p95_ms': percentile(seconds, 95) * 1000,
+            'p99_ms': percentile(seconds, 99) * 1000,
+            'queries': sum(queries) / len(queries) if queries else None,
+        })
+    return rows
@@ -0,0 +1,78 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from benchmark.seed import EMAIL
+from core.models import Recipe
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+from recipe import fast
+
+
+class Command(BaseCommand):
+    """Django command to compare DRF's and the fast JSON codecs"""
+    help = (
+        'Time rendering and parsing a seeded benchmark user\'s recipe list '
+        'with DRF\'s JSON renderer and parser and with the fast ones.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=500,
+                            help='Rows in the rendered list.')
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def _time(self, func, repeat):
+        """Return the best time in ms to call func"""
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        email = EMAIL.format(0)
+        if not Recipe.objects.filter(user__email=email).exists():
+            raise CommandError('No benchmark data, run seed_benchmark first')
+
+        request = Request(
+            APIRequestFactory().get('/?expand=tags,ingredients')
+        )
+        queryset = Recipe.objects.filter(user__email=email) \
+            .order_by('-id')[:options['recipes']]
+        data = fast.FastRecipeSerializer(
+            list(fast.FastRecipeSerializer.trim_queryset(queryset, request)),
+            many=True, context={'request': request}
+        ).data
+        body = JSONRenderer().render(data)
+
+        def parse(parser):
+            return lambda: parser.parse(
+                io.BytesIO(body), 'application/json', {'encoding': 'utf-8'}
+            )
+
+        cases = (
+            ('render', lambda: JSONRenderer().render(data),
+             lambda: FastJSONRenderer().render(data)),
+            ('parse', parse(JSONParser()), parse(FastJSONParser())),
+        )
+        self.stdout.write(
+            f'{len(data)} recipes, {len(body) / 1024:.0f} KiB of JSON'
+        )
+        self.stdout.write(
+            f'{"case":<10}{"drf ms":>10}{"fast ms":>10}{"speedup":>9}'
+        )
+        for name, drf, fast_func in cases:
+            drf_ms = self._time(drf, options['repeat'])
+            fast_ms = self._time(fast_func, options['repeat'])
+            self.stdout.write(
+                f'{name:<10}{drf_ms:>10.2f}{fast_ms:>10.2f}'
+                f'{drf_ms / fast_ms:>8.1f}x'
+            )
@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from benchmark.seed import EMAIL
+from core.models import Tag, Recipe
+from recipe import fast, serializers
+
+# (name, query string, DRF serializer, fast serializer, model, many)
+CASES = (
+    ('recipe list', '', serializers.RecipeSerializer,
+     fast.FastRecipeSerializer, Recipe, True),
+    ('recipe list id,title,price', 'fields=id,title,price',
+     serializers.RecipeSerializer, fast.FastRecipeSerializer, Recipe, True),
+    ('recipe list expanded', 'expand=tags,ingredients',
+     serializers.RecipeSerializer, fast.FastRecipeSerializer, Recipe, True),
+    ('recipe detail', '', serializers.RecipeDetailSerializer,
+     fast.FastRecipeDetailSerializer, Recipe, False),
+    ('tag list', '', serializers.TagSerializer, fast.FastTagSerializer,
+     Tag, True),
+)
+
+
+class Command(BaseCommand):
+    """Django command to compare DRF and fast-path serializers"""
+    help = (
+        'Time building list and detail responses for a seeded benchmark '
+        'user with the DRF serializers and the fast-path serializers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=500,
+                            help='Rows serialized per list.')
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def _time(self, serializer_class, queryset, request, many, repeat):
+        """Return the best time in ms to query and serialize"""
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            trim = getattr(serializer_class, 'trim_queryset', None)
+            rows = trim(queryset, request) if trim else queryset.all()
+            instance = list(rows) if many else rows[0]
+            serializer_class(
+                instance, many=many, context={'request': request}
+            ).data
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        email = EMAIL.format(0)
+        if not Recipe.objects.filter(user__email=email).exists():
+            raise CommandError('No benchmark data, run seed_benchmark first')
+
+        factory = APIRequestFactory()
+        self.stdout.write(
+            f'{"case":<28}{"drf ms":>10}{"fast ms":>10}{"speedup":>9}'
+        )
+        for name, query, drf, fast_class, model, many in CASES:
+            request = Request(factory.get(f'/?{query}'))
+            queryset = model.objects.filter(user__email=email) \
+                .order_by('-id')[:options['recipes'] if many else 1]
+            drf_ms = self._time(
+                drf, queryset, request, many, options['repeat']
+            )
+            fast_ms = self._time(
+                fast_class, queryset, request, many, options['repeat']
+            )
+            self.stdout.write(
+                f'{name:<28}{drf_ms:>10.1f}{fast_ms:>10.1f}'
+                f'{drf_ms / fast_ms:>8.1f}x'
+            )
@@ -0,0 +1,60 @@
+import random
+import time
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import UserRateThrottle
+
+from core.throttling import UserScopeThrottle
+
+
+class Command(BaseCommand):
+    """Django command to compare the cost of DRF's and the API's throttles"""
+    help = (
+        'Time rate limit checks against the throttle cache with DRF\'s '
+        'UserRateThrottle and the sliding window UserScopeThrottle.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=600,
+                            help='Checks per throttle, all within the rate.')
+
+    def _time(self, throttle_class, checks):
+        """Return the mean time in microseconds of a check"""
+        request = Request(APIRequestFactory().get('/'))
+        # A user no earlier run has counted against.
+        request.user = SimpleNamespace(
+            pk=f'benchmark-{random.getrandbits(64)}', is_authenticated=True
+        )
+        start = time.perf_counter()
+        for _ in range(checks):
+            if not throttle_class().allow_request(request, None):
+                raise AssertionError('Throttled during the benchmark')
+        return (time.perf_counter() - start) / checks * 1000000
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        checks = options['checks']
+        rate = f'{checks}/hour'
+
+        class DRFThrottle(UserRateThrottle):
+            def get_rate(self):
+                return rate
+
+        rates = dict(api_settings.DEFAULT_THROTTLE_RATES, reads=rate)
+        with override_settings(REST_FRAMEWORK=dict(
+                api_settings.user_settings, DEFAULT_THROTTLE_RATES=rates)):
+            DRFThrottle.cache = UserScopeThrottle().cache
+            self.stdout.write(
+                f'cache {settings.THROTTLE_CACHE_ALIAS!r}, {checks} checks'
+            )
+            for name, throttle_class in (
+                    ('drf UserRateThrottle', DRFThrottle),
+                    ('UserScopeThrottle', UserScopeThrottle)):
+                micros = self._time(throttle_class, checks)
+                self.stdout.write(f'{name:<24}{micros:>10.1f} us/check')
@@ -0,0 +1,87 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmark import driver
+
+
+class Command(BaseCommand):
+    """Django command to replay mixed traffic against the API"""
+    help = (
+        'Replay a mix of list, detail, filter, search, create and '
+        'upload-image requests as the seeded benchmark users and report '
+        'latency percentiles and queries per request.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--threads', type=int, default=1)
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed, for reproducible traffic.')
+        parser.add_argument(
+            '--url',
+            help='Base URL of a running server. Requests are sent through '
+                 'the test client in this process when omitted.'
+        )
+        parser.add_argument(
+            '--mix',
+            help='Comma separated operation=weight pairs, e.g. '
+                 'list=50,detail=50.'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        mix = None
+        if options['mix']:
+            try:
+                mix = {
+                    op: int(weight) for op, weight in
+                    (pair.split('=') for pair in options['mix'].split(','))
+                }
+            except ValueError:
+                raise CommandError('--mix must look like list=50,detail=50')
+            unknown = set(mix) - set(driver.DEFAULT_MIX)
+            if unknown:
+                raise CommandError(
+                    'Unknown operations: {}'.format(', '.join(unknown))
+                )
+
+        if options['url']:
+            def transport():
+                return driver.HttpTransport(options['url'])
+        else:
+            host = (settings.ALLOWED_HOSTS or ['localhost'])[0]
+
+            def transport():
+                return driver.LocalTransport(host)
+
+        start = time.perf_counter()
+        try:
+            samples = driver.run(
+                transport,
+                options['requests'],
+                threads=options['threads'],
+                mix=mix,
+                seed=options['seed'],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f'{"operation":<14}{"requests":>9}{"errors":>8}'
+            f'{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"queries":>9}'
+        )
+        for row in driver.summarize(samples):
+            queries = '-' if row['queries'] is None \
+                else f'{row["queries"]:.1f}'
+            self.stdout.write(
+                f'{row["operation"]:<14}{row["requests"]:>9}'
+                f'{row["errors"]:>8}{row["p50_ms"]:>9.1f}'
+                f'{row["p95_ms"]:>9.1f}{row["p99_ms"]:>9.1f}{queries:>9}'
+            )
+        self.stdout.write(
+            f'{len(samples)} requests in {elapsed:.1f}s '
+            f'({len(samples) / elapsed:.1f} req/s)'
+        )
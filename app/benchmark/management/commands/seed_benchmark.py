@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from benchmark.seed import seed
+
+
+class Command(BaseCommand):
+    """Django command to seed users and recipes for benchmarking"""
+    help = 'Create benchmark users with tags, ingredients and recipes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--recipes', type=int, default=1000,
+                            help='Recipes per user.')
+        parser.add_argument('--tags', type=int, default=30,
+                            help='Tags per user.')
+        parser.add_argument('--ingredients', type=int, default=100,
+                            help='Ingredients per user.')
+        parser.add_argument('--tags-per-recipe', type=int, default=4)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed, for reproducible data.')
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        self.stdout.write('Seeding benchmark data...')
+        tokens = seed(
+            options['users'],
+            options['recipes'],
+            seed=options['seed'],
+            tags=options['tags'],
+            ingredients=options['ingredients'],
+            tags_per_recipe=options['tags_per_recipe'],
+            ingredients_per_recipe=options['ingredients_per_recipe'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(tokens)} users'
+        ))
@@ -0,0 +1,102 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from rest_framework.authtoken.models import Token
+
+from core.counts import refresh_recipe_counts
+from core.models import Tag, Ingredient, Recipe
+from core.search import update_search_vectors
+from recipe.filters import recipe_through
+
+BATCH_SIZE = 10000
+EMAIL = 'benchmark-{}@example.com'
+PASSWORD = 'benchmarkpass123'
+
+WORDS = (
+    'chicken', 'beef', 'tofu', 'salmon', 'rice', 'noodle', 'curry', 'stew',
+    'salad', 'soup', 'roast', 'spicy', 'lemon', 'garlic', 'ginger', 'basil',
+    'tomato', 'mushroom', 'coconut', 'honey', 'pepper', 'cheese', 'bean',
+    'potato', 'chocolate', 'vanilla', 'apple', 'pork', 'lentil', 'pesto',
+)
+
+
+def _title(rng):
+    return ' '.join(rng.sample(WORDS, rng.randint(2, 4))).capitalize()
+
+
+def _link(relation, recipes, targets, fanout, rng):
+    """Bulk insert a random fan-out of through rows for each recipe"""
+    through, column = recipe_through(relation)
+    fanout = min(fanout, len(targets))
+    through.objects.bulk_create(
+        (
+            through(recipe_id=recipe.id, **{column: target.id})
+            for recipe in recipes
+            for target in rng.sample(targets, rng.randint(0, fanout))
+        ),
+        batch_size=BATCH_SIZE
+    )
+
+
+def seed_user(user, recipes, tags=30, ingredients=100, tags_per_recipe=4,
+              ingredients_per_recipe=10, rng=None):
+    """Top a user up to the given number of recipes, tags and ingredients
+
+    Every table is written with bulk inserts in batches, so seeding
+    millions of recipes takes minutes rather than hours.
+    """
+    rng = rng or random.Random()
+    with transaction.atomic():
+        tag_objs = list(Tag.objects.filter(user=user))
+        tag_objs += Tag.objects.bulk_create(
+            Tag(user=user, name=f'{rng.choice(WORDS)} {i}')
+            for i in range(len(tag_objs), tags)
+        )
+        ingredient_objs = list(Ingredient.objects.filter(user=user))
+        ingredient_objs += Ingredient.objects.bulk_create(
+            Ingredient(user=user, name=f'{rng.choice(WORDS)} {i}')
+            for i in range(len(ingredient_objs), ingredients)
+        )
+
+        remaining = recipes - Recipe.objects.filter(user=user).count()
+        while remaining > 0:
+            batch = Recipe.objects.bulk_create([
+                Recipe(
+                    user=user,
+                    title=_title(rng),
+                    time_minutes=rng.randint(5, 180),
+                    price=rng.randint(100, 99900) / 100,
+                )
+                for _ in range(min(BATCH_SIZE, remaining))
+            ])
+            _link('tags', batch, tag_objs, tags_per_recipe, rng)
+            _link(
+                'ingredients', batch, ingredient_objs,
+                ingredients_per_recipe, rng
+            )
+            update_search_vectors(recipe.id for recipe in batch)
+            remaining -= len(batch)
+        refresh_recipe_counts(Tag, (tag.id for tag in tag_objs))
+        refresh_recipe_counts(
+            Ingredient, (ingredient.id for ingredient in ingredient_objs)
+        )
+
+
+def seed(users, recipes_per_user, seed=None, **options):
+    """Create benchmark users with tokens and data, returning the tokens"""
+    rng = random.Random(seed)
+    tokens = []
+    for i in range(users):
+        user = get_user_model().objects.filter(email=EMAIL.format(i)).first()
+        if user is None:
+            user = get_user_model().objects.create_user(
+                EMAIL.format(i), PASSWORD
+            )
+        seed_user(user, recipes_per_user, rng=rng, **options)
+        tokens.append(Token.objects.get_or_create(user=user)[0].key)
+
+    # Refresh planner statistics so the new rows don't get stale plans.
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return tokens
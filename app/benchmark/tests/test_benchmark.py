@@ -0,0 +1,83 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from benchmark import driver
+from benchmark.seed import seed
+from core.models import Recipe, Tag
+
+
+class BenchmarkTests(TestCase):
+    '''Test the benchmark seeder and load driver'''
+
+    def test_seed(self):
+        '''Test seeding creates users with recipes and tags'''
+        tokens = seed(2, 30, seed=1, tags=5, ingredients=10)
+
+        self.assertEqual(len(tokens), 2)
+        self.assertEqual(Recipe.objects.count(), 60)
+        self.assertEqual(Tag.objects.count(), 10)
+
+        seed(2, 30, seed=1, tags=5, ingredients=10)
+        self.assertEqual(Recipe.objects.count(), 60)
+
+    def test_run_and_summarize(self):
+        '''Test replaying traffic reports every operation'''
+        seed(1, 20, seed=1, tags=5, ingredients=10)
+        mix = dict(driver.DEFAULT_MIX)
+        del mix['upload-image']
+
+        samples = driver.run(
+            lambda: driver.LocalTransport('testserver'), 60, mix=mix, seed=1
+        )
+        rows = driver.summarize(samples)
+
+        self.assertEqual(len(samples), 60)
+        self.assertEqual(sum(row['errors'] for row in rows), 0)
+        for row in rows:
+            self.assertLessEqual(row['p50_ms'], row['p99_ms'])
+            self.assertGreater(row['queries'], 0)
+
+    def test_percentile(self):
+        '''Test nearest-rank percentiles'''
+        values = list(range(1, 101))
+        self.assertEqual(driver.percentile(values, 50), 50)
+        self.assertEqual(driver.percentile(values, 99), 99)
+        self.assertEqual(driver.percentile([3], 95), 3)
+        self.assertIsNone(driver.percentile([], 50))
+
+    def test_server_timing_queries(self):
+        '''Test reading the query count from a Server-Timing header'''
+        header = 'db;dur=1.2;desc="3 queries", total;dur=4.0'
+        self.assertEqual(driver.server_timing_queries(header), 3)
+        self.assertIsNone(driver.server_timing_queries(None))
+
+    def test_benchmark_serializers(self):
+        '''Test comparing serializers reports every case'''
+        seed(1, 20, seed=1, tags=5, ingredients=10)
+        out = StringIO()
+
+        call_command('benchmark_serializers', repeat=1, stdout=out)
+
+        self.assertIn('recipe list expanded', out.getvalue())
+        self.assertIn('tag list', out.getvalue())
+
+    def test_benchmark_renderers(self):
+        '''Test comparing JSON codecs reports rendering and parsing'''
+        seed(1, 20, seed=1, tags=5, ingredients=10)
+        out = StringIO()
+
+        call_command('benchmark_renderers', repeat=1, stdout=out)
+
+        self.assertIn('render', out.getvalue())
+        self.assertIn('parse', out.getvalue())
+
+    def test_benchmark_throttles(self):
+        '''Test comparing throttles reports both'''
+        out = StringIO()
+
+        call_command('benchmark_throttles', checks=5, stdout=out)
+
+        self.assertIn('drf UserRateThrottle', out.getvalue())
+        self.assertIn('UserScopeThrottle', out.getvalue())
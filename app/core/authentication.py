@@ -0,0 +1,130 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from core.routers import primary_reads, reading_from_replicas
+
+KEY_PREFIX = 'auth-token:'
+
+
+class LocalTokenCache:
+    """Bounded in-process LRU of token key to (user, token)
+
+    Entries also expire after `timeout` seconds, which bounds how long
+    another worker process can serve a token invalidated elsewhere.
+    """
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SharedTokenCache:
+    """Token cache stored in one of Django's configured cache backends"""
+
+    def __init__(self, alias, timeout):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key):
+        return self.cache.get(KEY_PREFIX + key)
+
+    def set(self, key, value):
+        self.cache.set(KEY_PREFIX + key, value, self.timeout)
+
+    def delete(self, key):
+        self.cache.delete(KEY_PREFIX + key)
+
+    def clear(self):
+        self.cache.clear()
+
+
+_token_cache = None
+
+
+def get_token_cache():
+    """Return the token cache configured in settings"""
+    global _token_cache
+    if _token_cache is None:
+        if settings.TOKEN_AUTH_CACHE_ALIAS:
+            _token_cache = SharedTokenCache(
+                settings.TOKEN_AUTH_CACHE_ALIAS,
+                settings.TOKEN_AUTH_CACHE_TIMEOUT
+            )
+        else:
+            _token_cache = LocalTokenCache(
+                settings.TOKEN_AUTH_CACHE_SIZE,
+                settings.TOKEN_AUTH_CACHE_TIMEOUT
+            )
+    return _token_cache
+
+
+def invalidate_token(key):
+    """Drop a token from the cache"""
+    get_token_cache().delete(key)
+
+
+def invalidate_user_tokens(user_id):
+    """Drop every cached token belonging to a user"""
+    keys = Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+    for key in keys:
+        invalidate_token(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches the token to user lookup"""
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        cached = cache.get(key)
+        if cached is None:
+            try:
+                cached = super().authenticate_credentials(key)
+            except exceptions.AuthenticationFailed:
+                # A token created moments ago may not be on the replica yet.
+                if not reading_from_replicas():
+                    raise
+                with primary_reads():
+                    cached = super().authenticate_credentials(key)
+            cache.set(key, cached)
+
+        user, token = cached
+        # Hand each request its own copy so views that modify request.user
+        # never mutate the instance shared through the cache.
+        return copy.copy(user), token
@@ -0,0 +1,56 @@
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import Now
+
+from core.models import Tag, Ingredient, Recipe
+
+# Recount the links of each tag or ingredient, writing only the rows whose
+# stored count is wrong. Counts are part of the API output, so a change marks
+# the row as updated for /api/sync.
+REFRESH_RECIPE_COUNT_SQL = '''
+    UPDATE {table} AS t SET recipe_count = c.n, updated_at = now()
+    FROM (
+        SELECT o.id, count(l.recipe_id) AS n
+        FROM {table} o
+        LEFT JOIN {through} l ON l.{column} = o.id
+        {where}
+        GROUP BY o.id
+    ) c
+    WHERE t.id = c.id AND t.recipe_count <> c.n
+'''
+
+
+def recipe_link(model):
+    """Return the recipe through model and column linking to model"""
+    relation = {Tag: 'tags', Ingredient: 'ingredients'}[model]
+    return getattr(Recipe, relation).through, f'{model._meta.model_name}_id'
+
+
+def adjust_recipe_counts(model, ids, delta):
+    """Add delta to the recipe count of the given tags or ingredients
+
+    `ids` may be a list or a queryset of ids, which is then used as a
+    subquery.
+    """
+    model.objects.filter(pk__in=ids).update(
+        recipe_count=F('recipe_count') + delta, updated_at=Now()
+    )
+
+
+def refresh_recipe_counts(model, ids=None):
+    """Recount recipes for the given ids (or all rows), returning the
+    number of counts that were corrected"""
+    if ids is not None:
+        ids = list(ids)
+        if not ids:
+            return 0
+    through, column = recipe_link(model)
+    sql = REFRESH_RECIPE_COUNT_SQL.format(
+        table=model._meta.db_table,
+        through=through._meta.db_table,
+        column=column,
+        where='' if ids is None else 'WHERE o.id = ANY(%(ids)s)',
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {'ids': ids})
+        return cursor.rowcount
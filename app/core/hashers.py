@@ -0,0 +1,87 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+_state = threading.local()
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing pool has no free slot while shedding load"""
+
+
+@contextmanager
+def shed_hashing_load():
+    """Refuse hashes inside the block when the pool is full
+
+    Outside the block, as for admin logins and management commands,
+    hashes wait for a slot instead.
+    """
+    previous = getattr(_state, 'shedding', False)
+    _state.shedding = True
+    try:
+        yield
+    finally:
+        _state.shedding = previous
+
+
+class HashingPool:
+    """Bounded pool of threads computing password hashes
+
+    At most `workers` hashes run at once; up to `max_pending` more wait for
+    a thread. Inside `shed_hashing_load()` anything beyond that is refused
+    with PasswordHashingBusy instead of queueing behind a login storm.
+    """
+
+    def __init__(self, workers, max_pending):
+        self._executor = ThreadPoolExecutor(
+            workers, thread_name_prefix='password-hash'
+        )
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+
+    def run(self, func, *args):
+        shedding = getattr(_state, 'shedding', False)
+        if not self._slots.acquire(blocking=not shedding):
+            raise PasswordHashingBusy()
+        try:
+            return self._executor.submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    """Return the process's hashing pool, or None to hash inline"""
+    global _pool
+    if settings.PASSWORD_HASHING_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashingPool(
+                settings.PASSWORD_HASHING_WORKERS,
+                settings.PASSWORD_HASHING_MAX_PENDING
+            )
+    return _pool
+
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2 hasher running in the hashing pool when one is configured
+
+    It keeps the `pbkdf2_sha256` algorithm name, so existing hashes verify
+    unchanged. hashlib releases the GIL while hashing, so the pool's
+    threads run in parallel with the request threads.
+    """
+
+    def encode(self, password, salt, iterations=None):
+        pool = get_hashing_pool()
+        if pool is None:
+            return super().encode(password, salt, iterations)
+        return pool.run(super().encode, password, salt, iterations)
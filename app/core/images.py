@@ -0,0 +1,276 @@
+import datetime
+import hashlib
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, JpegImagePlugin
+
+from core.models import Recipe, ImageJob, RECIPE_IMAGE_DIR, \
+    RECIPE_UPLOAD_DIR, recipe_image_file_path
+from core.storage import content_hash, image_storage
+from core.versioning import bump_collection_version
+
+MAX_ATTEMPTS = 3
+
+
+def variant_name(name, variant):
+    """Return the storage name of a resized variant of an image"""
+    root, _ = os.path.splitext(name)
+    ext = settings.RECIPE_IMAGE_VARIANT_FORMAT.lower()
+    return f'{root}_{variant}.{ext}'
+
+
+def inspect_image(file):
+    """Return the format and size read from an image file's header
+
+    Only the header is read, so oversized images and decompression bombs
+    are refused without decoding any pixels. Raises ValueError if the file
+    isn't an image in RECIPE_IMAGE_FORMATS or has more than
+    RECIPE_IMAGE_MAX_PIXELS pixels.
+    """
+    file.seek(0)
+    try:
+        image = Image.open(file)
+    except Image.DecompressionBombError:
+        raise ValueError('too many pixels')
+    except (OSError, SyntaxError):
+        raise ValueError('not an image')
+    finally:
+        file.seek(0)
+    if image.format not in settings.RECIPE_IMAGE_FORMATS:
+        raise ValueError(f'unsupported format {image.format}')
+    width, height = image.size
+    if width * height > settings.RECIPE_IMAGE_MAX_PIXELS:
+        raise ValueError('too many pixels')
+    return image.format, image.size
+
+
+def lock_image(name):
+    """Hold a lock on a stored image name until the transaction ends
+
+    Taken before a recipe is pointed at a file that may already exist and
+    before collecting a file, so a file is never deleted just as a recipe
+    starts using it.
+    """
+    key = int.from_bytes(
+        hashlib.sha256(name.encode()).digest()[:8], 'big', signed=True
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [key])
+
+
+def attach_image(recipe, upload):
+    """Make an upload a recipe's image and queue it for processing
+
+    An image already processed for another of the user's recipes isn't
+    processed again: the recipe shares the processed file, its variants and
+    its status. Other users' images aren't shared this way, so an upload
+    can't reveal that someone else holds the same image. The image it
+    replaces is deleted once nothing refers to it.
+    """
+    digest = getattr(upload, 'content_hash', None) or content_hash(upload)
+    replaced = recipe.image.name
+    with transaction.atomic():
+        # Lock the recipe whose image is shared, so it can't be deleted and
+        # its files collected before this recipe refers to them too.
+        stored = Recipe.objects.select_for_update().filter(
+            user_id=recipe.user_id,
+            image_hash=digest,
+            image_status__in=(Recipe.IMAGE_READY, Recipe.IMAGE_FAILED)
+        ).exclude(image='').values_list('image', 'image_status').first()
+        recipe.image_hash = digest
+        if stored is not None:
+            recipe.image.name, recipe.image_status = stored
+            recipe.save(
+                update_fields=[
+                    'image', 'image_hash', 'image_status', 'updated_at'
+                ]
+            )
+        else:
+            lock_image(image_storage.content_name(
+                recipe_image_file_path(recipe, upload.name), upload
+            ))
+            recipe.image.save(upload.name, upload, save=False)
+            recipe.save(update_fields=['image', 'image_hash', 'updated_at'])
+            enqueue_image_processing(recipe)
+    if replaced and replaced != recipe.image.name:
+        transaction.on_commit(lambda: collect_orphans([replaced]))
+    return recipe
+
+
+def enqueue_image_processing(recipe):
+    """Mark a recipe's new image as pending and queue it for the worker"""
+    recipe.image_status = Recipe.IMAGE_PENDING
+    recipe.save(update_fields=['image_status', 'updated_at'])
+    ImageJob.objects.create(recipe=recipe, image=recipe.image.name)
+
+
+def _save(name, image, format, **params):
+    """Encode an image and write it to storage under name"""
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **params)
+    image_storage.overwrite(name, ContentFile(buffer.getvalue()))
+
+
+def process_image(name):
+    """Validate an uploaded image, strip its metadata and build variants
+
+    Returns the name of the stripped image, which is stored by content in
+    RECIPE_IMAGE_DIR.
+    """
+    with image_storage.open(name) as f:
+        inspect_image(f)
+        image = Image.open(f)
+        image.verify()
+    with image_storage.open(name) as f:
+        image = Image.open(f)
+        format = image.format
+        params = {}
+        # Colour profiles say how to show the pixels and identify nothing.
+        if image.info.get('icc_profile'):
+            params['icc_profile'] = image.info['icc_profile']
+        if format == 'JPEG':
+            # Re-encode with the upload's own quantization tables and chroma
+            # subsampling, so its quality isn't lowered to Pillow's default.
+            params['qtables'] = image.quantization
+            subsampling = JpegImagePlugin.get_sampling(image)
+            if subsampling != -1:
+                params['subsampling'] = subsampling
+        image = ImageOps.exif_transpose(image)
+        # Rebuilding the image from its pixels drops EXIF and any other
+        # metadata the original carried. The palette and transparency of
+        # palette images are part of their pixels, so keep those.
+        rebuilt = Image.frombytes(image.mode, image.size, image.tobytes())
+        if image.mode in ('P', 'PA'):
+            rebuilt.putpalette(image.getpalette())
+        if 'transparency' in image.info:
+            rebuilt.info['transparency'] = image.info['transparency']
+        image = rebuilt
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **params)
+    content = ContentFile(buffer.getvalue())
+    name = recipe_image_file_path(None, name, RECIPE_IMAGE_DIR)
+    lock_image(image_storage.content_name(name, content))
+    name = image_storage.save(name, content)
+    if image.mode not in ('RGB', 'RGBA'):
+        alpha = 'A' in image.getbands() or 'transparency' in image.info
+        image = image.convert('RGBA' if alpha else 'RGB')
+    for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((size, size))
+        _save(
+            variant_name(name, variant),
+            resized,
+            settings.RECIPE_IMAGE_VARIANT_FORMAT,
+            quality=80,
+            icc_profile=params.get('icc_profile')
+        )
+    return name
+
+
+def run_next_job():
+    """Process the oldest queued image, returning False if there was none
+
+    Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED so several
+    workers can drain the queue concurrently. Failed jobs wait before they
+    are retried, see RECIPE_IMAGE_RETRY_SECONDS.
+    """
+    with transaction.atomic():
+        job = ImageJob.objects.select_for_update(skip_locked=True) \
+            .filter(not_before__lte=timezone.now()).order_by('id').first()
+        if job is None:
+            return False
+
+        # Update every recipe still showing the upload. There may be none
+        # if it has been replaced, or processed by an earlier job, since.
+        recipes = Recipe.objects.filter(image=job.image)
+        user_ids = set(recipes.values_list('user_id', flat=True))
+        if user_ids:
+            try:
+                name = process_image(job.image)
+            except Exception:
+                job.attempts += 1
+                if job.attempts < MAX_ATTEMPTS:
+                    job.not_before = timezone.now() + datetime.timedelta(
+                        seconds=settings.RECIPE_IMAGE_RETRY_SECONDS
+                        * 2 ** (job.attempts - 1)
+                    )
+                    job.save(update_fields=['attempts', 'not_before'])
+                    return True
+                recipes.update(
+                    image_status=Recipe.IMAGE_FAILED,
+                    updated_at=timezone.now()
+                )
+            else:
+                recipes.update(
+                    image=name,
+                    image_status=Recipe.IMAGE_READY,
+                    updated_at=timezone.now()
+                )
+        job.delete()
+    collect_orphans([job.image])
+    # The status update bypasses save(), so invalidate cached lists here.
+    for user_id in user_ids:
+        bump_collection_version(user_id)
+    return True
+
+
+def collect_orphans(names):
+    """Delete stored images, and their variants, that no recipe or queued
+    job refers to any more"""
+    names = set(filter(None, names))
+    with transaction.atomic():
+        for name in sorted(names):
+            lock_image(name)
+        used = set(Recipe.objects.filter(image__in=names)
+                   .values_list('image', flat=True))
+        used.update(ImageJob.objects.filter(image__in=names)
+                    .values_list('image', flat=True))
+        for name in names - used:
+            image_storage.delete(name)
+            for variant in settings.RECIPE_IMAGE_VARIANTS:
+                image_storage.delete(variant_name(name, variant))
+
+
+def collect_stray_images(min_age):
+    """Delete files under the recipe upload and image directories that no
+    recipe or queued job refers to, returning the number deleted
+
+    Files modified in the last `min_age` seconds are kept, as they may
+    belong to an upload still being saved.
+    """
+    kept = set()
+    for queryset in (Recipe.objects.filter(image__gt=''), ImageJob.objects):
+        for name in queryset.values_list('image', flat=True).distinct():
+            kept.add(name)
+            kept.update(
+                variant_name(name, variant)
+                for variant in settings.RECIPE_IMAGE_VARIANTS
+            )
+
+    cutoff = timezone.now() - datetime.timedelta(seconds=min_age)
+    deleted = 0
+    directories = [
+        directory.rstrip('/')
+        for directory in (RECIPE_UPLOAD_DIR, RECIPE_IMAGE_DIR)
+    ]
+    while directories:
+        directory = directories.pop()
+        if not image_storage.exists(directory):
+            continue
+        subdirectories, files = image_storage.listdir(directory)
+        directories.extend(
+            os.path.join(directory, name) for name in subdirectories
+        )
+        for filename in files:
+            name = os.path.join(directory, filename)
+            if name in kept or image_storage.get_modified_time(name) > cutoff:
+                continue
+            image_storage.delete(name)
+            deleted += 1
+    return deleted
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core.images import collect_stray_images
+
+
+class Command(BaseCommand):
+    """Django command to delete recipe images nothing refers to"""
+    help = 'Delete stored recipe images that no recipe or job refers to.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=3600,
+            help='Keep files modified in the last this many seconds.'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        deleted = collect_stray_images(options['min_age'])
+        self.stdout.write(f'Deleted {deleted} file(s)')
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.images import run_next_job
+
+
+class Command(BaseCommand):
+    """Django command to process queued recipe images"""
+    help = 'Run a worker that processes uploaded recipe images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of polling.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait between polls of an empty queue.'
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        self.stdout.write('Processing images...')
+        while True:
+            processed = 0
+            while run_next_job():
+                processed += 1
+            if processed:
+                self.stdout.write(f'Processed {processed} image(s)')
+            if options['once']:
+                break
+            time.sleep(options['interval'])
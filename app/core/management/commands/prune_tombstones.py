@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from core.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    """Django command to delete expired sync tombstones"""
+    help = 'Delete records of deletions older than SYNC_TOMBSTONE_DAYS.'
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        self.stdout.write(f'Pruned {prune_tombstones()} tombstone(s)')
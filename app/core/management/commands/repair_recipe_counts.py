@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.counts import refresh_recipe_counts
+from core.models import Tag, Ingredient
+
+
+class Command(BaseCommand):
+    """Django command to recount recipes per tag and ingredient"""
+    help = 'Recount the recipes linked to every tag and ingredient.'
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        for model in (Tag, Ingredient):
+            repaired = refresh_recipe_counts(model)
+            self.stdout.write(
+                f'Repaired {repaired} {model._meta.verbose_name} count(s)'
+            )
@@ -1,20 +1,89 @@
+import sys
 import time
 
-from django.db import connections
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.migrations.executor import MigrationExecutor
 from django.db.utils import OperationalError
 from django.core.management.base import BaseCommand
 
+# Exit codes, so orchestrators can tell why startup was abandoned.
+EXIT_DATABASE_UNAVAILABLE = 1
+EXIT_MIGRATIONS_PENDING = 2
+
 
 class Command(BaseCommand):
-    """Django command to pause execution until database is available"""
+    """Django command to pause execution until database is available
+
+    The database is probed with a real connection and a `SELECT 1`,
+    retrying with exponential backoff until it answers or the timeout
+    runs out.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database alias to wait for'
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=60,
+            help='Seconds to wait in total before giving up'
+        )
+        parser.add_argument(
+            '--initial-delay', type=float, default=0.1,
+            help='Seconds to wait after the first failed attempt'
+        )
+        parser.add_argument(
+            '--max-delay', type=float, default=5,
+            help='Longest wait between two attempts'
+        )
+        parser.add_argument(
+            '--migrations', action='store_true',
+            help='Also wait until every migration has been applied'
+        )
+
+    def probe(self, connection):
+        """Run a trivial query, raising OperationalError on failure"""
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def pending_migrations(self, connection):
+        """Return the migrations not yet applied to the database"""
+        executor = MigrationExecutor(connection)
+        return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
     def handle(self, *args, **options):
         """Handle the command"""
+        connection = connections[options['database']]
+        deadline = time.monotonic() + options['timeout']
+        delay = options['initial_delay']
+
         self.stdout.write('Waiting for database...')
-        db_conn = None
-        while not db_conn:
+        while True:
             try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+                self.probe(connection)
+                if not options['migrations']:
+                    break
+                pending = len(self.pending_migrations(connection))
+                if not pending:
+                    break
+                reason = f'Migrations pending ({pending})'
+                code = EXIT_MIGRATIONS_PENDING
+            except OperationalError as exc:
+                # Drop a broken connection so the next attempt reconnects.
+                if not connection.in_atomic_block:
+                    connection.close()
+                reason = 'Database unavailable'
+                detail = str(exc).strip().splitlines()
+                if detail:
+                    reason = f'{reason} ({detail[0]})'
+                code = EXIT_DATABASE_UNAVAILABLE
+
+            if time.monotonic() + delay > deadline:
+                self.stderr.write(f'Gave up waiting: {reason}')
+                sys.exit(code)
+            self.stdout.write(f'{reason}, waiting {delay:g}s...')
+            time.sleep(delay)
+            delay = min(delay * 2, options['max_delay'])
+
         self.stdout.write(self.style.SUCCESS('Database available!'))
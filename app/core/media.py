@@ -0,0 +1,70 @@
+import mimetypes
+import os
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_safe
+
+from core.models import RECIPE_IMAGE_DIR, RECIPE_UPLOAD_DIR
+from core.storage import CONTENT_ADDRESSED_NAME, image_storage
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def _within(full_path, directory):
+    root = image_storage.path(directory.rstrip('/'))
+    return os.path.commonpath([full_path, root]) == root
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve an uploaded file from MEDIA_ROOT
+
+    Processed images and their variants are named by content and never
+    change, so they're cached for a year without revalidation and their
+    name is their ETag. Other files must be revalidated. Uploads waiting to
+    be processed still carry their EXIF metadata and aren't served.
+
+    The file itself is handed to the front-end server with X-Accel-Redirect
+    (MEDIA_ACCEL_REDIRECT_PREFIX) or X-Sendfile (MEDIA_USE_SENDFILE) when
+    configured, and streamed otherwise.
+    """
+    try:
+        full_path = image_storage.path(path)
+        info = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404
+    if not stat.S_ISREG(info.st_mode) or \
+            _within(full_path, RECIPE_UPLOAD_DIR):
+        raise Http404
+
+    if CONTENT_ADDRESSED_NAME.search(path) and \
+            _within(full_path, RECIPE_IMAGE_DIR):
+        etag = f'"{os.path.basename(path)}"'
+        cache_control = IMMUTABLE
+    else:
+        etag = f'"{int(info.st_mtime):x}-{info.st_size:x}"'
+        cache_control = 'no-cache'
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        content_type = mimetypes.guess_type(full_path)[0] or \
+            'application/octet-stream'
+        if settings.MEDIA_ACCEL_REDIRECT_PREFIX:
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = \
+                settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(path)
+        elif settings.MEDIA_USE_SENDFILE:
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = full_path
+        else:
+            response = FileResponse(
+                open(full_path, 'rb'), content_type=content_type
+            )
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    return response
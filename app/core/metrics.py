@@ -0,0 +1,127 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+
+TIME_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Histogram counting observed values per bucket (not cumulative)"""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def as_dict(self):
+        labels = [str(bound) for bound in self.bounds] + ['+Inf']
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+class MetricsRegistry:
+    """Per-process histograms of request metrics, keyed by view"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._views = defaultdict(lambda: {
+                'total_ms': Histogram(TIME_BUCKETS_MS),
+                'db_ms': Histogram(TIME_BUCKETS_MS),
+                'serialize_ms': Histogram(TIME_BUCKETS_MS),
+                'queries': Histogram(QUERY_BUCKETS),
+            })
+
+    def record(self, metrics):
+        with self._lock:
+            histograms = self._views[metrics.view]
+            histograms['total_ms'].observe(metrics.total_ms)
+            histograms['db_ms'].observe(metrics.db_ms)
+            histograms['serialize_ms'].observe(metrics.serialize_ms)
+            histograms['queries'].observe(metrics.queries)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view: {name: h.as_dict() for name, h in histograms.items()}
+                for view, histograms in self._views.items()
+            }
+
+
+registry = MetricsRegistry()
+
+
+class RequestMetrics:
+    """Timings and query counts collected while handling one request"""
+
+    def __init__(self):
+        self.view = 'unresolved'
+        self.start = time.perf_counter()
+        self.total_ms = 0
+        self.queries = 0
+        self.db_ms = 0
+        self.serialize_ms = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper counting and timing every query"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (time.perf_counter() - start) * 1000
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self.start) * 1000
+
+    def server_timing(self):
+        return ', '.join((
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"',
+            f'serialize;dur={self.serialize_ms:.1f}',
+            f'total;dur={self.total_ms:.1f}',
+        ))
+
+
+class _TimedSerializer:
+    """Proxy to a serializer that times building its `data`"""
+
+    def __init__(self, serializer, metrics):
+        self._serializer = serializer
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self._serializer, name)
+
+    @property
+    def data(self):
+        start = time.perf_counter()
+        try:
+            return self._serializer.data
+        finally:
+            self._metrics.serialize_ms += \
+                (time.perf_counter() - start) * 1000
+
+
+class SerializerTimingMixin:
+    """DRF view mixin adding serialization time to the request metrics"""
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        metrics = getattr(self.request._request, 'metrics', None)
+        if metrics is None:
+            return serializer
+        return _TimedSerializer(serializer, metrics)
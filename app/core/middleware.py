@@ -0,0 +1,85 @@
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from core.metrics import RequestMetrics, registry
+from core.routers import replica_reads, pin_to_primary, is_pinned
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def view_label(view_func, method):
+    """Return a label such as 'RecipeViewSet.list' for a resolved view"""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__name__', 'unknown')
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower())
+    return f'{cls.__name__}.{action}' if action else cls.__name__
+
+
+class RequestMetricsMiddleware:
+    """Record query count, database time and total time for every request
+
+    The results are added to the response as a Server-Timing header,
+    aggregated into the per-process histograms served by the metrics
+    endpoint, and logged when a request exceeds REQUEST_QUERY_BUDGET.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.metrics = metrics = RequestMetrics()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            response = self.get_response(request)
+        metrics.finish()
+
+        registry.record(metrics)
+        if settings.REQUEST_METRICS_SERVER_TIMING:
+            response['Server-Timing'] = metrics.server_timing()
+        budget = settings.REQUEST_QUERY_BUDGET
+        if budget is not None and metrics.queries > budget:
+            logger.warning(
+                'Query budget exceeded: %s %s (%s) ran %d queries in '
+                '%.1fms, budget %d',
+                request.method, request.path, metrics.view,
+                metrics.queries, metrics.db_ms, budget
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics.view = view_label(view_func, request.method)
+
+
+class ReplicaRoutingMiddleware:
+    """Serve safe requests from read replicas, with read-your-writes
+
+    Clients are identified by their Authorization header or session
+    cookie. Once a request from a client writes to the database, that
+    client's reads stay on the primary for DATABASE_REPLICA_PIN_SECONDS so
+    it never reads data older than its own writes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        identity = request.META.get('HTTP_AUTHORIZATION') or \
+            request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        enabled = bool(settings.DATABASE_REPLICAS) and \
+            request.method in SAFE_METHODS and \
+            not (identity and is_pinned(identity))
+
+        with replica_reads(enabled) as state:
+            response = self.get_response(request)
+            wrote = state.wrote
+        if wrote and identity and settings.DATABASE_REPLICAS:
+            pin_to_primary(identity)
+        return response
@@ -0,0 +1,44 @@
+# Generated by Django 2.1.15 on 2026-10-18 20:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_recipe_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', '-recipe_count'], name='core_ingredient_user_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', '-recipe_count'], name='core_tag_user_count_idx'),
+        ),
+        migrations.RunSQL(
+            '''
+            UPDATE core_tag SET recipe_count = (
+                SELECT count(*) FROM core_recipe_tags rt
+                WHERE rt.tag_id = core_tag.id
+            );
+            UPDATE core_ingredient SET recipe_count = (
+                SELECT count(*) FROM core_recipe_ingredients ri
+                WHERE ri.ingredient_id = core_ingredient.id
+            );
+            ''',
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.1.15 on 2026-10-18 21:15
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_recipe_image_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagejob',
+            name='not_before',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,17 +1,29 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import AbstractBaseUser,\
     BaseUserManager, PermissionsMixin
 from django.conf import settings
-import uuid
+from django.utils import timezone
+from core.storage import image_storage
 import os
 
 
-def recipe_image_file_path(instance, filename):
-    """Generate file path for new recipe image"""
-    ext = filename.split('.')[-1]
-    filename = f'{uuid.uuid4()}.{ext}'
+# Uploads wait in RECIPE_UPLOAD_DIR, still carrying their metadata, until
+# processing writes the stripped image to RECIPE_IMAGE_DIR.
+RECIPE_UPLOAD_DIR = 'uploads/incoming/'
+RECIPE_IMAGE_DIR = 'uploads/recipe/'
 
-    return os.path.join('uploads/recipe/', filename)
+
+def recipe_image_file_path(instance, filename, directory=RECIPE_UPLOAD_DIR):
+    """Generate file path for new recipe image
+
+    The storage replaces the file name with a hash of the content.
+    """
+    ext = filename.split('.')[-1].lower()
+    filename = f'image.{ext}'
+
+    return os.path.join(directory, filename)
 
 
 class UserManager(BaseUserManager):
@@ -58,9 +70,27 @@ class Tag(models.Model):
     name = models.CharField(max_length=255)
     user = models.ForeignKey(settings.AUTH_USER_MODEL,
                              on_delete=models.CASCADE)
+    # Maintained by core.signals, repaired by `manage.py repair_recipe_counts`
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ('-name',)
+        indexes = [
+            models.Index(
+                fields=['user', 'name'],
+                name='core_tag_user_name_idx'
+            ),
+            models.Index(
+                fields=['user', '-recipe_count'],
+                name='core_tag_user_count_idx'
+            ),
+            models.Index(
+                fields=['user', 'updated_at'],
+                name='core_tag_updated_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -73,6 +103,26 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    # Maintained by core.signals, repaired by `manage.py repair_recipe_counts`
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'name'],
+                name='core_ingredient_user_name_idx'
+            ),
+            models.Index(
+                fields=['user', '-recipe_count'],
+                name='core_ingredient_user_count_idx'
+            ),
+            models.Index(
+                fields=['user', 'updated_at'],
+                name='core_ingredient_updated_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -80,6 +130,15 @@ class Ingredient(models.Model):
 
 class Recipe(models.Model):
     """Recipe object"""
+    IMAGE_PENDING = 'pending'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUS_CHOICES = (
+        (IMAGE_PENDING, 'Pending'),
+        (IMAGE_READY, 'Ready'),
+        (IMAGE_FAILED, 'Failed'),
+    )
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
@@ -90,7 +149,77 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=recipe_image_file_path,
+        storage=image_storage
+    )
+    image_status = models.CharField(
+        max_length=10,
+        choices=IMAGE_STATUS_CHOICES,
+        blank=True
+    )
+    # SHA-256 of the uploaded image, so identical uploads share one file.
+    image_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'id'],
+                name='core_recipe_user_id_idx'
+            ),
+            models.Index(
+                fields=['user', 'updated_at'],
+                name='core_recipe_updated_idx'
+            ),
+            GinIndex(fields=['search_vector'], name='core_recipe_search_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class ImageJob(models.Model):
+    """Queued processing of a recipe's uploaded image"""
+    recipe = models.ForeignKey('Recipe', on_delete=models.CASCADE)
+    image = models.CharField(max_length=255)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    not_before = models.DateTimeField(default=timezone.now)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.image
+
+
+class Tombstone(models.Model):
+    """Record of a deleted recipe, tag or ingredient, read by /api/sync"""
+    KINDS = (
+        ('recipe', 'Recipe'),
+        ('tag', 'Tag'),
+        ('ingredient', 'Ingredient'),
+    )
+
+    # No constraint, so deleting a user can still record its deletions.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+'
+    )
+    kind = models.CharField(max_length=20, choices=KINDS)
+    object_id = models.IntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'deleted_at'],
+                name='core_tombstone_user_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
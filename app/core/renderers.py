@@ -0,0 +1,55 @@
+from rest_framework.utils import encoders
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+_encoder = encoders.JSONEncoder()
+
+
+def dumps(data, default=_encoder.default):
+    """Serialize data to compact UTF-8 JSON bytes
+
+    Uses orjson when it is installed. Types orjson doesn't handle itself,
+    as well as datetimes, are converted by `default`, which matches DRF's
+    encoder unless given, so the output is the same as the stdlib path.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            data,
+            default=default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        )
+    return _StdlibEncoder(default).encode(data).encode()
+
+
+class _StdlibEncoder(encoders.JSONEncoder):
+    def __init__(self, default):
+        super().__init__(ensure_ascii=False, separators=(',', ':'))
+        self._default = default
+
+    def default(self, obj):
+        return self._default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer serializing with orjson when it is installed
+
+    Indented output, as requested by the browsable API or an `indent`
+    media type parameter, is left to DRF's renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or \
+                self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = dumps(data)
+        # Escape the line separators that aren't valid in JavaScript
+        # strings, as DRF does.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028') \
+                .replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,97 @@
+import hashlib
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+
+PIN_KEY_PREFIX = 'db-pin:'
+
+_state = threading.local()
+
+
+def _pin_key(identity):
+    return PIN_KEY_PREFIX + hashlib.sha256(identity.encode()).hexdigest()
+
+
+def pin_to_primary(identity):
+    """Send a client's reads to the primary while replicas catch up"""
+    caches['default'].set(
+        _pin_key(identity), 1, settings.DATABASE_REPLICA_PIN_SECONDS
+    )
+
+
+def is_pinned(identity):
+    """Return True if a client wrote too recently to read from replicas"""
+    return bool(caches['default'].get(_pin_key(identity)))
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Route reads to replicas inside the block, until the first write
+
+    Yields the routing state, whose `wrote` attribute is set once any
+    write has been routed to the primary. One replica is picked for the
+    whole block so its reads see a single snapshot.
+    """
+    previous = (
+        getattr(_state, 'replicas', False), getattr(_state, 'wrote', None),
+        getattr(_state, 'replica', None)
+    )
+    _state.replicas = enabled
+    _state.wrote = False
+    _state.replica = None
+    try:
+        yield _state
+    finally:
+        _state.replicas, _state.wrote, _state.replica = previous
+
+
+@contextmanager
+def primary_reads():
+    """Route reads to the primary inside the block"""
+    previous = getattr(_state, 'replicas', False)
+    _state.replicas = False
+    try:
+        yield
+    finally:
+        _state.replicas = previous
+
+
+def reading_from_replicas():
+    """Return True if reads are currently routed to a replica"""
+    return bool(
+        settings.DATABASE_REPLICAS and getattr(_state, 'replicas', False)
+        and not _state.wrote
+    )
+
+
+class ReplicaRouter:
+    """Route reads to a replica when enabled, everything else to the
+    primary
+
+    Reads only go to replicas inside `replica_reads()`, which the
+    ReplicaRoutingMiddleware enters for safe requests. The first write
+    switches the rest of the block back to the primary, so a request
+    always sees its own changes.
+    """
+
+    def db_for_read(self, model, **hints):
+        if reading_from_replicas():
+            if _state.replica is None:
+                _state.replica = random.choice(settings.DATABASE_REPLICAS)
+            return _state.replica
+        return None
+
+    def db_for_write(self, model, **hints):
+        if getattr(_state, 'wrote', None) is not None:
+            _state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
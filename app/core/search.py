@@ -0,0 +1,69 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import DecimalField, F
+from django.db.models.functions import Cast
+
+# Recipe titles weigh more than ingredient names, which weigh more than tags.
+UPDATE_SEARCH_VECTOR_SQL = '''
+    UPDATE core_recipe SET search_vector =
+        setweight(to_tsvector(%(config)s, title), 'A') ||
+        setweight(to_tsvector(%(config)s, coalesce((
+            SELECT string_agg(i.name, ' ')
+            FROM core_ingredient i
+            JOIN core_recipe_ingredients ri ON ri.ingredient_id = i.id
+            WHERE ri.recipe_id = core_recipe.id
+        ), '')), 'B') ||
+        setweight(to_tsvector(%(config)s, coalesce((
+            SELECT string_agg(t.name, ' ')
+            FROM core_tag t
+            JOIN core_recipe_tags rt ON rt.tag_id = t.id
+            WHERE rt.recipe_id = core_recipe.id
+        ), '')), 'C')
+    WHERE id = ANY(%(ids)s)
+'''
+
+
+def update_search_vectors(recipe_ids):
+    """Recompute the search vector of the given recipes in one statement"""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(UPDATE_SEARCH_VECTOR_SQL, {
+            'config': settings.RECIPE_SEARCH_CONFIG,
+            'ids': recipe_ids,
+        })
+
+
+class PrefixSearchQuery(SearchQuery):
+    """A tsquery matching documents that contain every term as a prefix"""
+
+    def __init__(self, terms, config=None):
+        self.tsquery = ' & '.join(f'{term}:*' for term in terms)
+        super().__init__(self.tsquery, config=config)
+
+    def as_sql(self, compiler, connection):
+        config_sql, config_params = compiler.compile(self.config)
+        template = f'to_tsquery({config_sql}::regconfig, %s)'
+        return template, config_params + [self.tsquery]
+
+
+def search_recipes(queryset, text):
+    """Filter recipes matching a search string, ranked best match first
+
+    The rank is a decimal so cursor pagination can compare against it
+    exactly, which it can't with a float.
+    """
+    terms = re.findall(r'\w+', text)
+    if not terms:
+        return queryset
+    query = PrefixSearchQuery(terms, config=settings.RECIPE_SEARCH_CONFIG)
+    return queryset.filter(search_vector=query).annotate(
+        rank=Cast(
+            SearchRank(F('search_vector'), query),
+            DecimalField(max_digits=12, decimal_places=8)
+        )
+    ).order_by('-rank', '-id')
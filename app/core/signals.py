@@ -0,0 +1,172 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete, \
+    m2m_changed
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.authentication import invalidate_token, invalidate_user_tokens
+from core.counts import recipe_link, adjust_recipe_counts, \
+    refresh_recipe_counts
+from core.images import collect_orphans
+from core.models import Recipe, Tag, Ingredient, Tombstone
+from core.search import update_search_vectors
+from core.sync import touch_recipes
+from core.versioning import bump_collection_version
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_tokens_on_user_save(sender, instance, created, **kwargs):
+    """Drop cached tokens when a user is deactivated or changes password"""
+    if not created:
+        invalidate_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token_on_delete(sender, instance, **kwargs):
+    """Drop a cached token when it is deleted"""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=Recipe)
+def update_search_vector_on_save(sender, instance, update_fields, **kwargs):
+    """Reindex a recipe when its title may have changed"""
+    if update_fields is None or 'title' in update_fields:
+        update_search_vectors([instance.pk])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_search_vector_on_m2m(sender, instance, action, reverse, pk_set,
+                                **kwargs):
+    """Reindex recipes whose tags or ingredients changed"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            update_search_vectors([instance.pk])
+    elif action == 'pre_clear':
+        instance._cleared_recipe_ids = list(
+            instance.recipe_set.values_list('id', flat=True)
+        )
+    elif action == 'post_clear':
+        update_search_vectors(instance._cleared_recipe_ids)
+    elif action in ('post_add', 'post_remove'):
+        update_search_vectors(pk_set)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_recipe_counts_on_m2m(sender, instance, action, reverse, model,
+                                pk_set, **kwargs):
+    """Keep tag and ingredient recipe counts in step with their links"""
+    if reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_recipe_counts(type(instance), [instance.pk])
+        return
+
+    # Only newly linked ids are sent for adds, but removes get every id
+    # asked for, so count the links that actually exist before they go.
+    _, column = recipe_link(model)
+    links = sender.objects.filter(recipe_id=instance.pk)
+    if action == 'post_add' and pk_set:
+        adjust_recipe_counts(model, pk_set, 1)
+    elif action == 'pre_remove':
+        adjust_recipe_counts(
+            model, links.filter(**{f'{column}__in': pk_set}).values(column), -1
+        )
+    elif action == 'pre_clear':
+        adjust_recipe_counts(model, links.values(column), -1)
+
+
+@receiver(pre_delete, sender=Recipe)
+def update_recipe_counts_on_delete(sender, instance, **kwargs):
+    """Decrement the counts of a deleted recipe's tags and ingredients"""
+    for model in (Tag, Ingredient):
+        through, column = recipe_link(model)
+        adjust_recipe_counts(
+            model,
+            through.objects.filter(recipe_id=instance.pk).values(column),
+            -1
+        )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def update_search_vector_on_rename(sender, instance, created, **kwargs):
+    """Reindex the recipes using a tag or ingredient that was saved"""
+    if not created:
+        update_search_vectors(
+            instance.recipe_set.values_list('id', flat=True)
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_recipes_on_delete(sender, instance, **kwargs):
+    """Note the recipes using a tag or ingredient about to be deleted"""
+    instance._deleted_recipe_ids = list(
+        instance.recipe_set.values_list('id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def update_search_vector_on_delete(sender, instance, **kwargs):
+    """Reindex the recipes that used a deleted tag or ingredient
+
+    The links go in the cascade, which sends no m2m_changed.
+    """
+    update_search_vectors(getattr(instance, '_deleted_recipe_ids', []))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def bump_version_on_change(sender, instance, **kwargs):
+    """Invalidate the owner's cached list responses"""
+    bump_collection_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def bump_version_on_m2m(sender, instance, action, **kwargs):
+    """Invalidate cached list responses when recipe links change"""
+    if action.startswith('post_'):
+        bump_collection_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def touch_recipes_on_m2m(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    """Mark recipes whose tags or ingredients changed as updated"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            touch_recipes([instance.pk])
+    elif action == 'post_clear':
+        # Collected on pre_clear by update_search_vector_on_m2m.
+        touch_recipes(instance._cleared_recipe_ids)
+    elif action in ('post_add', 'post_remove'):
+        touch_recipes(pk_set)
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def record_tombstone_on_delete(sender, instance, **kwargs):
+    """Remember deletions so /api/sync can report them"""
+    Tombstone.objects.create(
+        user_id=instance.user_id,
+        kind=sender._meta.model_name,
+        object_id=instance.pk
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def collect_image_on_delete(sender, instance, **kwargs):
+    """Delete a deleted recipe's image once no other recipe shares it"""
+    name = instance.image.name
+    if name:
+        transaction.on_commit(lambda: collect_orphans([name]))
@@ -0,0 +1,76 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+# Matches names written by ContentAddressedStorage, and the variants derived
+# from them, capturing the content hash.
+CONTENT_ADDRESSED_NAME = re.compile(r'(?:^|/)([0-9a-f]{64})[^/]*$')
+
+
+def content_hash(file):
+    """Return the SHA-256 of a file's content, reading it in chunks"""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage naming files after the SHA-256 of their content
+
+    Content saved under `dir/anything.ext` is stored as
+    `dir/<hash[:2]>/<hash>.ext`, so identical files are stored once and a
+    name always refers to the same bytes. Files carrying a `content_hash`
+    (see core.uploads) aren't read again to name them.
+
+    Files are written to a temporary file and renamed into place, so a
+    name is never seen half written.
+    """
+
+    def content_name(self, name, content):
+        """Return the name content saved under `name` is stored as"""
+        digest = getattr(content, 'content_hash', None) or \
+            content_hash(content)
+        directory, filename = os.path.split(name)
+        _, ext = os.path.splitext(filename)
+        return os.path.join(directory, digest[:2], digest + ext.lower())
+
+    def save(self, name, content, max_length=None):
+        name = self.content_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+    def get_available_name(self, name, max_length=None):
+        # A name already taken holds the same content.
+        return name
+
+    def overwrite(self, name, content):
+        """Store content under exactly `name`, replacing any file there"""
+        return self._save(name, content)
+
+    def _save(self, name, content):
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in content.chunks():
+                    f.write(chunk)
+            os.chmod(temp_path, self.file_permissions_mode or 0o644)
+            os.replace(temp_path, full_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return name
+
+
+image_storage = ContentAddressedStorage()
@@ -0,0 +1,71 @@
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.models import Recipe, Tombstone
+
+
+def touch_recipes(recipe_ids):
+    """Mark recipes as updated after a change that bypassed save()"""
+    recipe_ids = list(recipe_ids)
+    if recipe_ids:
+        Recipe.objects.filter(pk__in=recipe_ids).update(
+            updated_at=timezone.now()
+        )
+
+
+def make_token(moment):
+    """Return the opaque sync token for a point in time"""
+    return str(int(moment.timestamp() * 1000000))
+
+
+def parse_token(token):
+    """Return the point in time of a sync token, raising ValueError if it
+    is malformed"""
+    micros = int(token)
+    if micros < 0:
+        raise ValueError(token)
+    return datetime.datetime.fromtimestamp(
+        micros / 1000000, tz=datetime.timezone.utc
+    )
+
+
+def tombstone_horizon():
+    """Return the time before which tombstones may have been pruned"""
+    return timezone.now() - datetime.timedelta(
+        days=settings.SYNC_TOMBSTONE_DAYS
+    )
+
+
+def _window_start(since):
+    # Timestamps are taken when a row is saved but only become visible when
+    # its transaction commits, so each sync re-reads the last
+    # SYNC_OVERLAP_SECONDS to pick up rows that committed late.
+    return since - datetime.timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+
+
+def changed_since(queryset, since):
+    """Filter rows updated since a sync token's point in time"""
+    return queryset.filter(updated_at__gte=_window_start(since))
+
+
+def deleted_since(user, since):
+    """Return the ids of a user's objects deleted since a sync token's
+    point in time, as {'recipes': [...], 'tags': [...], ...}"""
+    deleted = {f'{kind}s': [] for kind, _ in Tombstone.KINDS}
+    tombstones = Tombstone.objects.filter(
+        user=user, deleted_at__gte=_window_start(since)
+    ).order_by('id').values_list('kind', 'object_id')
+    for kind, object_id in tombstones:
+        deleted[f'{kind}s'].append(object_id)
+    return deleted
+
+
+def prune_tombstones():
+    """Delete tombstones older than the retention period, returning the
+    number deleted"""
+    deleted, _ = Tombstone.objects.filter(
+        deleted_at__lt=tombstone_horizon()
+    ).delete()
+    return deleted
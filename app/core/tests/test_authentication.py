@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.authentication import CachedTokenAuthentication, \
+    LocalTokenCache, get_token_cache
+from users.serializers import UserSerializer
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    '''Test the caching token authentication class'''
+
+    def setUp(self):
+        get_token_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_lookup_is_cached(self):
+        '''Test a token is only looked up in the database once'''
+        user, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user, self.user)
+
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user, self.user)
+        self.assertEqual(token, self.token)
+
+    def test_deactivated_user_invalidated(self):
+        '''Test deactivating a user stops their cached token working'''
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_password_change_invalidated(self):
+        '''Test changing password through the serializer clears the cache'''
+        self.auth.authenticate_credentials(self.token.key)
+        serializer = UserSerializer(
+            self.user, data={'password': 'newpass123'}, partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        with self.assertNumQueries(1):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertTrue(user.check_password('newpass123'))
+
+    def test_deleted_token_invalidated(self):
+        '''Test deleting a token stops it authenticating'''
+        self.auth.authenticate_credentials(self.token.key)
+        self.token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_local_cache_evicts_least_recently_used(self):
+        '''Test the local cache is bounded'''
+        cache = LocalTokenCache(maxsize=2, timeout=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
@@ -1,25 +1,56 @@
-from unittest.mock import patch
+from unittest.mock import patch, call
 
 from django.core.management import call_command
 from django.db.utils import OperationalError
 from django.test import TestCase
 
+ENSURE_CONNECTION = \
+    'django.db.backends.base.base.BaseDatabaseWrapper.ensure_connection'
+PENDING_MIGRATIONS = \
+    'core.management.commands.wait_for_db.Command.pending_migrations'
+
 
 class CommandsTestCase(TestCase):
 
     def test_wait_for_db_ready(self):
         """Test waiting for db when db is available"""
 
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
+        with patch(ENSURE_CONNECTION) as ec:
             call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+            self.assertTrue(ec.called)
 
     @patch('time.sleep', return_value=None)
     def test_wait_for_db(self, ts):
-        """Test waiting for db"""
+        """Test waiting for db backs off exponentially"""
 
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+        with patch(ENSURE_CONNECTION) as ec:
+            ec.side_effect = [OperationalError] * 5 + [None] * 2
+            call_command('wait_for_db', max_delay=1)
+
+        self.assertEqual(
+            ts.call_args_list,
+            [call(0.1), call(0.2), call(0.4), call(0.8), call(1)]
+        )
+
+    def test_wait_for_db_timeout(self):
+        """Test giving up exits with a non-zero code"""
+
+        with patch(ENSURE_CONNECTION) as ec:
+            ec.side_effect = OperationalError
+            with self.assertRaises(SystemExit) as cm:
+                call_command('wait_for_db', timeout=0)
+
+        self.assertEqual(cm.exception.code, 1)
+
+    def test_wait_for_migrations(self):
+        """Test waiting for migrations when they are all applied"""
+        call_command('wait_for_db', migrations=True)
+
+    @patch(PENDING_MIGRATIONS, return_value=[('core', False)])
+    def test_wait_for_migrations_pending(self, pm):
+        """Test pending migrations exit with their own code"""
+
+        with self.assertRaises(SystemExit) as cm:
+            call_command('wait_for_db', migrations=True, timeout=0)
+
+        self.assertEqual(cm.exception.code, 2)
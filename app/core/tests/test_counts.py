@@ -0,0 +1,90 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import Tag, Ingredient, Recipe
+
+
+class RecipeCountTests(TestCase):
+    '''Test recipe counts on tags and ingredients are maintained'''
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testpass123'
+        )
+        self.tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        self.tag2 = Tag.objects.create(user=self.user, name='Dessert')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user, name='Salt'
+        )
+        self.recipe1 = self.create_recipe('Soup')
+        self.recipe2 = self.create_recipe('Cake')
+
+    def create_recipe(self, title):
+        return Recipe.objects.create(
+            user=self.user, title=title, time_minutes=5, price=1.00
+        )
+
+    def assertCounts(self, tag1, tag2):
+        self.assertEqual(
+            Tag.objects.get(pk=self.tag1.pk).recipe_count, tag1
+        )
+        self.assertEqual(
+            Tag.objects.get(pk=self.tag2.pk).recipe_count, tag2
+        )
+
+    def test_add_and_remove(self):
+        '''Test linking and unlinking tags updates their counts'''
+        self.recipe1.tags.add(self.tag1, self.tag2)
+        self.recipe2.tags.add(self.tag1)
+        self.recipe2.tags.add(self.tag1)
+        self.assertCounts(2, 1)
+
+        self.recipe1.tags.remove(self.tag1)
+        self.recipe1.tags.remove(self.tag1)
+        self.assertCounts(1, 1)
+
+        self.recipe1.tags.set([self.tag1])
+        self.assertCounts(2, 0)
+
+        self.recipe2.tags.clear()
+        self.assertCounts(1, 0)
+
+    def test_reverse_relation(self):
+        '''Test linking recipes from the tag side updates its count'''
+        self.tag1.recipe_set.add(self.recipe1, self.recipe2)
+        self.assertCounts(2, 0)
+
+        self.tag1.recipe_set.remove(self.recipe1)
+        self.assertCounts(1, 0)
+
+        self.tag1.recipe_set.clear()
+        self.assertCounts(0, 0)
+
+    def test_recipe_delete(self):
+        '''Test deleting a recipe decrements its tags and ingredients'''
+        self.recipe1.tags.add(self.tag1)
+        self.recipe1.ingredients.add(self.ingredient)
+        self.recipe2.tags.add(self.tag1)
+
+        self.recipe1.delete()
+
+        self.assertCounts(1, 0)
+        self.ingredient.refresh_from_db()
+        self.assertEqual(self.ingredient.recipe_count, 0)
+
+    def test_repair_command(self):
+        '''Test the repair command fixes counts that drifted'''
+        self.recipe1.tags.add(self.tag1)
+        Tag.objects.filter(pk=self.tag1.pk).update(recipe_count=7)
+        Tag.objects.filter(pk=self.tag2.pk).update(recipe_count=3)
+
+        out = StringIO()
+        call_command('repair_recipe_counts', stdout=out)
+
+        self.assertCounts(1, 0)
+        self.assertIn('Repaired 2 tag count(s)', out.getvalue())
+        self.assertIn('Repaired 0 ingredient count(s)', out.getvalue())
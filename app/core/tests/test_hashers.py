@@ -0,0 +1,154 @@
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import hashers
+
+TOKEN_URL = reverse('users:token')
+HEALTH_URL = reverse('health-live')
+
+
+class HashingPoolTests(TestCase):
+    '''Test hashing passwords in a bounded pool'''
+
+    def setUp(self):
+        self.pool = hashers.HashingPool(workers=1, max_pending=1)
+        self.addCleanup(self.pool.shutdown)
+
+    def test_run(self):
+        '''Test work runs on a pool thread'''
+        self.assertTrue(self.pool.run(
+            lambda: threading.current_thread().name.startswith('password-hash')
+        ))
+
+    def test_sheds_load(self):
+        '''Test calls beyond the workers and pending slots are refused'''
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        callers = [
+            threading.Thread(target=self.pool.run, args=(block,))
+            for _ in range(2)
+        ]
+        for caller in callers:
+            caller.start()
+        started.wait(5)
+        try:
+            with self.assertRaises(hashers.PasswordHashingBusy), \
+                    hashers.shed_hashing_load():
+                self.pool.run(lambda: None)
+        finally:
+            release.set()
+            for caller in callers:
+                caller.join()
+        self.assertIsNone(self.pool.run(lambda: None))
+
+    def test_waits_outside_views(self):
+        '''Test calls outside the login views wait for a free slot'''
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        callers = [
+            threading.Thread(target=self.pool.run, args=(block,))
+            for _ in range(2)
+        ]
+        for caller in callers:
+            caller.start()
+        started.wait(5)
+        results = []
+        waiting = threading.Thread(
+            target=lambda: results.append(self.pool.run(lambda: 'done'))
+        )
+        waiting.start()
+        waiting.join(0.2)
+        try:
+            self.assertTrue(waiting.is_alive())
+        finally:
+            release.set()
+            for caller in callers:
+                caller.join()
+            waiting.join()
+        self.assertEqual(results, ['done'])
+
+
+@override_settings(PASSWORD_HASHING_WORKERS=2)
+class PooledHasherTests(TestCase):
+    '''Test the PBKDF2 hasher offloading to the pool'''
+
+    def setUp(self):
+        cache.clear()
+        patcher = patch('core.hashers._pool', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_hash_compatible(self):
+        '''Test pooled hashes keep the standard PBKDF2 format'''
+        encoded = make_password('testpass123')
+
+        self.assertTrue(encoded.startswith('pbkdf2_sha256$'))
+        self.assertTrue(check_password('testpass123', encoded))
+        self.assertIsNotNone(hashers._pool)
+
+    def test_login_busy(self):
+        '''Test logins answer 429 when the pool is full'''
+        get_user_model().objects.create_user(
+            'test@londonappdev.com', 'pass1234'
+        )
+
+        with patch.object(hashers.HashingPool, 'run',
+                          side_effect=hashers.PasswordHashingBusy):
+            res = APIClient().post(TOKEN_URL, {
+                'email': 'test@londonappdev.com', 'password': 'pass1234'
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '1')
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1,
+                       PASSWORD_HASHING_MAX_PENDING=0)
+    def test_login_over_limit_not_blocked(self):
+        '''Test a login over the limit answers 429 without waiting while
+        other requests are served'''
+        get_user_model().objects.create_user(
+            'test@londonappdev.com', 'pass1234'
+        )
+        pool = hashers.get_hashing_pool()
+        self.addCleanup(pool.shutdown)
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        busy = threading.Thread(target=pool.run, args=(block,))
+        busy.start()
+        started.wait(5)
+        try:
+            res = APIClient().post(TOKEN_URL, {
+                'email': 'test@londonappdev.com', 'password': 'pass1234'
+            })
+            self.assertEqual(
+                res.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+            )
+            self.assertTrue(busy.is_alive())
+            res = APIClient().get(HEALTH_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+        finally:
+            release.set()
+            busy.join()
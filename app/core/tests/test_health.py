@@ -0,0 +1,56 @@
+from unittest.mock import patch
+
+from django.db.utils import OperationalError
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+LIVE_URL = reverse('health-live')
+READY_URL = reverse('health-ready')
+
+
+class HealthCheckTests(TestCase):
+    '''Test the liveness and readiness endpoints'''
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_live(self):
+        '''Test the liveness check needs no authentication'''
+        res = self.client.get(LIVE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'status': 'ok'})
+
+    def test_ready(self):
+        '''Test the readiness check reports every backing service'''
+        res = self.client.get(READY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['database:default'], 'ok')
+        self.assertEqual(res.data['cache:default'], 'ok')
+
+    @patch('django.core.cache.backends.locmem.LocMemCache.set')
+    def test_not_ready(self, cache_set):
+        '''Test the readiness check fails when a service is down'''
+        cache_set.side_effect = OperationalError('cache down')
+
+        with self.assertLogs('core.views', 'ERROR') as logs:
+            res = self.client.get(READY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res.data['cache:default'], 'failed')
+        self.assertNotIn('cache down', res.content.decode())
+        self.assertIn('cache down', logs.output[0])
+
+    @patch('django.core.cache.backends.locmem.LocMemCache.get')
+    def test_cache_not_storing(self, cache_get):
+        '''Test the readiness check fails when the cache loses writes'''
+        cache_get.return_value = None
+
+        with self.assertLogs('core.views', 'ERROR'):
+            res = self.client.get(READY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res.data['cache:default'], 'failed')
@@ -0,0 +1,295 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image, ImageCms
+from unittest.mock import patch
+import io
+import struct
+import zlib
+
+from core import images
+from core.models import Recipe, ImageJob
+
+
+def sample_image(size=(1000, 500), exif=True):
+    '''Return JPEG bytes, optionally carrying EXIF metadata'''
+    image = Image.new('RGB', size, 'red')
+    params = {}
+    if exif:
+        data = Image.Exif()
+        data[0x010f] = 'Test camera'
+        params['exif'] = data.tobytes()
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', **params)
+    return buffer.getvalue()
+
+
+def png_header(width, height):
+    '''Return a PNG declaring a size without the pixel data to match'''
+    def chunk(kind, data):
+        crc = zlib.crc32(kind + data)
+        return struct.pack('>I', len(data)) + kind + data + \
+            struct.pack('>I', crc)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + \
+        chunk(b'IDAT', zlib.compress(b'')) + chunk(b'IEND', b'')
+
+
+class ImageProcessingTests(TestCase):
+    '''Test the background recipe image processing'''
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testpass123'
+        )
+        self.recipe = Recipe.objects.create(
+            user=user,
+            title='Sample recipe',
+            time_minutes=10,
+            price=5.00
+        )
+
+    def tearDown(self):
+        if not self.recipe.image:
+            return
+        for variant in settings.RECIPE_IMAGE_VARIANTS:
+            default_storage.delete(
+                images.variant_name(self.recipe.image.name, variant)
+            )
+        self.recipe.image.delete()
+
+    def upload(self, content):
+        self.recipe.image.save('image.jpg', ContentFile(content))
+        images.enqueue_image_processing(self.recipe)
+
+    def test_inspect_image(self):
+        '''Test reading the format and size from an image's header'''
+        file = ContentFile(sample_image())
+
+        self.assertEqual(images.inspect_image(file), ('JPEG', (1000, 500)))
+        self.assertEqual(file.tell(), 0)
+
+    def test_inspect_image_refuses_bombs(self):
+        '''Test images declaring too many pixels are refused'''
+        with self.assertRaises(ValueError):
+            images.inspect_image(ContentFile(png_header(20000, 20000)))
+        with self.settings(RECIPE_IMAGE_MAX_PIXELS=100):
+            with self.assertRaises(ValueError):
+                images.inspect_image(ContentFile(png_header(11, 10)))
+
+    def test_inspect_image_refuses_other_files(self):
+        '''Test files that aren't images in an allowed format are refused'''
+        buffer = io.BytesIO()
+        Image.new('RGB', (10, 10)).save(buffer, format='BMP')
+
+        with self.assertRaises(ValueError):
+            images.inspect_image(ContentFile(b'notanimage'))
+        with self.assertRaises(ValueError):
+            images.inspect_image(ContentFile(buffer.getvalue()))
+
+    def test_attach_image_dedupes(self):
+        '''Test identical uploads share one stored and processed image'''
+        other = Recipe.objects.create(
+            user=self.recipe.user,
+            title='Other recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        content = sample_image()
+        images.attach_image(self.recipe, ContentFile(content, 'a.jpg'))
+        images.run_next_job()
+        images.attach_image(other, ContentFile(content, 'b.jpg'))
+
+        self.recipe.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(other.image.name, self.recipe.image.name)
+        self.assertEqual(other.image_hash, self.recipe.image_hash)
+        self.assertEqual(other.image_status, Recipe.IMAGE_READY)
+        self.assertFalse(ImageJob.objects.exists())
+
+    def test_attach_image_dedupes_per_user(self):
+        '''Test another user's identical upload is processed separately'''
+        user = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'testpass123'
+        )
+        other = Recipe.objects.create(
+            user=user,
+            title='Other recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        content = sample_image()
+        images.attach_image(self.recipe, ContentFile(content, 'a.jpg'))
+        images.run_next_job()
+        images.attach_image(other, ContentFile(content, 'b.jpg'))
+
+        other.refresh_from_db()
+        self.assertEqual(other.image_status, Recipe.IMAGE_PENDING)
+        self.assertTrue(ImageJob.objects.filter(recipe=other).exists())
+        images.run_next_job()
+        self.recipe.refresh_from_db()
+
+    @patch('django.db.transaction.on_commit', lambda func: func())
+    @override_settings(RECIPE_IMAGE_RETRY_SECONDS=0)
+    def test_replaced_image_collected(self):
+        '''Test a replaced image is deleted unless another recipe has it'''
+        other = Recipe.objects.create(
+            user=self.recipe.user,
+            title='Other recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        images.attach_image(self.recipe, ContentFile(sample_image(), 'a'))
+        images.attach_image(other, ContentFile(sample_image(), 'a'))
+        shared = self.recipe.image.name
+
+        images.attach_image(self.recipe, ContentFile(b'new', 'b.jpg'))
+        self.assertTrue(default_storage.exists(shared))
+
+        images.attach_image(other, ContentFile(b'new', 'b.jpg'))
+        # The uploads' jobs still refer to it until they run.
+        self.assertTrue(default_storage.exists(shared))
+        while images.run_next_job():
+            pass
+        self.assertFalse(default_storage.exists(shared))
+        other.image.delete()
+
+    @patch('django.db.transaction.on_commit', lambda func: func())
+    def test_deleted_recipe_image_collected(self):
+        '''Test a deleted recipe's image and variants are deleted'''
+        self.upload(sample_image())
+        images.run_next_job()
+        self.recipe.refresh_from_db()
+        name = self.recipe.image.name
+        thumbnail = images.variant_name(name, 'thumbnail')
+
+        self.recipe.delete()
+
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(default_storage.exists(thumbnail))
+        self.recipe.image = None
+
+    def test_collect_stray_images(self):
+        '''Test files nothing refers to are deleted once old enough'''
+        self.upload(sample_image())
+        stray = default_storage.save(
+            'uploads/recipe/stray.jpg', ContentFile(b'stray')
+        )
+
+        self.assertEqual(images.collect_stray_images(3600), 0)
+        self.assertEqual(images.collect_stray_images(-60), 1)
+        self.assertFalse(default_storage.exists(stray))
+        self.assertTrue(default_storage.exists(self.recipe.image.name))
+
+    def test_enqueue_marks_pending(self):
+        '''Test queueing an image marks the recipe as pending'''
+        self.upload(sample_image())
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_PENDING)
+        self.assertTrue(ImageJob.objects.filter(recipe=self.recipe).exists())
+
+    def test_process_image(self):
+        '''Test processing strips metadata and writes resized variants'''
+        self.upload(sample_image())
+
+        self.assertTrue(images.run_next_job())
+        self.assertFalse(images.run_next_job())
+
+        upload = self.recipe.image.name
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_READY)
+        self.assertFalse(ImageJob.objects.exists())
+        self.assertNotEqual(self.recipe.image.name, upload)
+        self.assertFalse(default_storage.exists(upload))
+        with default_storage.open(self.recipe.image.name) as f:
+            self.assertNotIn('exif', Image.open(f).info)
+        name = images.variant_name(self.recipe.image.name, 'thumbnail')
+        with default_storage.open(name) as f:
+            thumbnail = Image.open(f)
+            self.assertEqual(thumbnail.size, (200, 100))
+            self.assertEqual(thumbnail.format, 'WEBP')
+
+    def test_process_palette_image(self):
+        '''Test processing keeps the colours of palette images'''
+        image = Image.new('RGB', (100, 50), (255, 0, 0))
+        image = image.convert('P', palette=Image.ADAPTIVE)
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        self.upload(buffer.getvalue())
+
+        images.run_next_job()
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_READY)
+        with default_storage.open(self.recipe.image.name) as f:
+            stored = Image.open(f)
+            self.assertEqual(stored.mode, 'P')
+            self.assertEqual(
+                stored.convert('RGB').getpixel((0, 0)), (255, 0, 0)
+            )
+        name = images.variant_name(self.recipe.image.name, 'thumbnail')
+        with default_storage.open(name) as f:
+            red, green, blue = Image.open(f).convert('RGB').getpixel((0, 0))
+            self.assertGreater(red, 200)
+            self.assertLess(green + blue, 50)
+
+    def test_process_image_keeps_quality(self):
+        '''Test processing keeps the colour profile and JPEG quality'''
+        profile = ImageCms.ImageCmsProfile(
+            ImageCms.createProfile('sRGB')
+        ).tobytes()
+        buffer = io.BytesIO()
+        Image.new('RGB', (100, 50), 'red').save(
+            buffer, format='JPEG', quality=95, icc_profile=profile
+        )
+        with Image.open(io.BytesIO(buffer.getvalue())) as source:
+            qtables = source.quantization
+        self.upload(buffer.getvalue())
+
+        images.run_next_job()
+
+        self.recipe.refresh_from_db()
+        with default_storage.open(self.recipe.image.name) as f:
+            stored = Image.open(f)
+            self.assertEqual(stored.info['icc_profile'], profile)
+            self.assertEqual(stored.quantization, qtables)
+        name = images.variant_name(self.recipe.image.name, 'thumbnail')
+        with default_storage.open(name) as f:
+            self.assertEqual(Image.open(f).info['icc_profile'], profile)
+
+    @override_settings(RECIPE_IMAGE_RETRY_SECONDS=0)
+    def test_invalid_image_fails(self):
+        '''Test an image that can't be decoded is marked as failed'''
+        self.upload(b'notanimage')
+
+        for _ in range(images.MAX_ATTEMPTS):
+            self.assertTrue(images.run_next_job())
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_FAILED)
+        self.assertFalse(ImageJob.objects.exists())
+
+    def test_failed_image_retried_later(self):
+        '''Test a failed image waits longer before each retry'''
+        self.upload(b'notanimage')
+
+        self.assertTrue(images.run_next_job())
+        self.assertFalse(images.run_next_job())
+        job = ImageJob.objects.get()
+        self.assertEqual(job.attempts, 1)
+        delay = job.not_before - timezone.now()
+        self.assertGreater(delay.total_seconds(), 25)
+        self.assertLessEqual(delay.total_seconds(), 30)
+
+        ImageJob.objects.update(not_before=timezone.now())
+        self.assertTrue(images.run_next_job())
+        job.refresh_from_db()
+        self.assertGreater((job.not_before - timezone.now()).total_seconds(),
+                           55)
@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from core.models import Tag, Ingredient, Recipe
+from core.search import search_recipes
+from recipe.filters import filter_recipes_by_related
+
+
+def explain(queryset):
+    '''Return the query plan for a queryset with sequential scans disabled'''
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute(f'EXPLAIN {sql}', params)
+        return '\n'.join(row[0] for row in cursor.fetchall())
+
+
+class IndexTests(TestCase):
+    '''Test the recipe API's hot queries are served by indexes'''
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testpass123'
+        )
+
+    def assertIndexScan(self, queryset, index=None):
+        plan = explain(queryset)
+        self.assertNotIn('Seq Scan', plan)
+        if index:
+            self.assertIn(index, plan)
+            self.assertNotIn('Sort', plan)
+
+    def test_tag_list_uses_user_name_index(self):
+        '''Test listing a user's tags by name uses the composite index'''
+        self.assertIndexScan(
+            Tag.objects.filter(user=self.user).order_by('-name'),
+            'core_tag_user_name_idx'
+        )
+
+    def test_ingredient_list_uses_user_name_index(self):
+        '''Test listing a user's ingredients uses the composite index'''
+        self.assertIndexScan(
+            Ingredient.objects.filter(user=self.user).order_by('-name'),
+            'core_ingredient_user_name_idx'
+        )
+
+    def test_recipe_list_uses_index(self):
+        '''Test listing a user's recipes avoids a sequential scan'''
+        self.assertIndexScan(
+            Recipe.objects.filter(user=self.user).order_by('-id')
+        )
+
+    def test_recipe_filters_use_indexes(self):
+        '''Test filtering recipes by tags or ingredients uses indexes'''
+        recipes = Recipe.objects.filter(user=self.user).order_by('-id')
+        for relation in ('tags', 'ingredients'):
+            self.assertIndexScan(
+                filter_recipes_by_related(recipes, relation, [1, 2])
+            )
+            self.assertIndexScan(
+                filter_recipes_by_related(
+                    recipes, relation, [1, 2], match_all=True
+                )
+            )
+
+    def test_assigned_only_uses_indexes(self):
+        '''Test listing assigned or most used tags uses indexes'''
+        for model in (Tag, Ingredient):
+            objects = model.objects.filter(user=self.user)
+            self.assertIndexScan(objects.filter(recipe_count__gt=0))
+            self.assertIndexScan(
+                objects.order_by('-recipe_count')[:10],
+                f'core_{model._meta.model_name}_user_count_idx'
+            )
+
+    def test_recipe_search_uses_gin_index(self):
+        '''Test searching recipes uses the full-text index'''
+        plan = explain(search_recipes(Recipe.objects.all(), 'chicken cur'))
+        self.assertIn('core_recipe_search_idx', plan)
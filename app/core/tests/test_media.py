@@ -0,0 +1,89 @@
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase
+from django.urls import reverse
+
+from core.storage import image_storage
+
+
+def media_url(name):
+    """Return the URL serving a stored file"""
+    return reverse('media', args=[name])
+
+
+class MediaTests(TestCase):
+    '''Test serving uploaded files'''
+
+    def setUp(self):
+        self.name = image_storage.save(
+            'uploads/recipe/image.jpg', ContentFile(b'image')
+        )
+        self.legacy = default_storage.save(
+            'uploads/recipe/legacy.jpg', ContentFile(b'legacy')
+        )
+
+    def tearDown(self):
+        image_storage.delete(self.name)
+        default_storage.delete(self.legacy)
+
+    def test_content_addressed_file_immutable(self):
+        '''Test files named by content are cached without revalidation'''
+        res = self.client.get(media_url(self.name))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), b'image')
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', res['Cache-Control'])
+        self.assertIn(self.name.split('/')[-1], res['ETag'])
+
+    def test_other_file_revalidated(self):
+        '''Test other files must be revalidated'''
+        res = self.client.get(media_url(self.legacy))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Cache-Control'], 'no-cache')
+
+    def test_not_modified(self):
+        '''Test a matching If-None-Match gets a 304'''
+        etag = self.client.get(media_url(self.name))['ETag']
+
+        res = self.client.get(media_url(self.name), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_pending_upload_not_served(self):
+        '''Test uploads waiting to be processed aren't served'''
+        name = image_storage.save(
+            'uploads/incoming/image.jpg', ContentFile(b'upload')
+        )
+        self.addCleanup(image_storage.delete, name)
+
+        res = self.client.get(media_url(name))
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_missing_file(self):
+        '''Test missing files and paths outside MEDIA_ROOT are not found'''
+        for path in ('uploads/recipe/missing.jpg', 'uploads/recipe',
+                     '../etc/passwd'):
+            res = self.client.get('/media/' + path)
+            self.assertEqual(res.status_code, 404)
+
+    def test_accel_redirect(self):
+        '''Test files are handed to nginx when configured'''
+        prefix = '/protected-media/'
+        with self.settings(MEDIA_ACCEL_REDIRECT_PREFIX=prefix):
+            res = self.client.get(media_url(self.name))
+
+        self.assertEqual(res['X-Accel-Redirect'], prefix + self.name)
+        self.assertEqual(res.content, b'')
+        self.assertIn('immutable', res['Cache-Control'])
+
+    def test_sendfile(self):
+        '''Test files are handed over with X-Sendfile when configured'''
+        with self.settings(MEDIA_USE_SENDFILE=True):
+            res = self.client.get(media_url(self.name))
+
+        self.assertEqual(res['X-Sendfile'], image_storage.path(self.name))
+        self.assertEqual(res.content, b'')
@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.metrics import registry, Histogram
+from core.models import Recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+METRICS_URL = reverse('metrics')
+
+
+class RequestMetricsTests(TestCase):
+    '''Test request metrics collection and reporting'''
+
+    def setUp(self):
+        registry.reset()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price=2.00
+        )
+
+    def test_server_timing_header(self):
+        '''Test responses report query count and timings'''
+        res = self.client.get(RECIPES_URL)
+
+        timing = res['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('queries"', timing)
+        self.assertIn('serialize;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_metrics_recorded_per_view(self):
+        '''Test requests are aggregated into histograms per view action'''
+        self.client.get(RECIPES_URL)
+        self.client.get(RECIPES_URL, {'page_size': 1})
+
+        snapshot = registry.snapshot()
+        histograms = snapshot['RecipeViewSet.list']
+        self.assertEqual(histograms['total_ms']['count'], 2)
+        self.assertGreater(histograms['queries']['sum'], 0)
+
+    @override_settings(REQUEST_QUERY_BUDGET=0)
+    def test_query_budget_logged(self):
+        '''Test requests over the query budget are logged'''
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            self.client.get(RECIPES_URL)
+
+        self.assertIn('RecipeViewSet.list', logs.output[0])
+
+    def test_metrics_endpoint_requires_staff(self):
+        '''Test only staff can read the metrics endpoint'''
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get(RECIPES_URL)
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('RecipeViewSet.list', res.data)
+
+    def test_histogram_buckets(self):
+        '''Test values are counted in the first bucket they fit'''
+        histogram = Histogram((1, 10))
+        for value in (0, 1, 5, 50):
+            histogram.observe(value)
+
+        self.assertEqual(
+            histogram.as_dict()['buckets'], {'1': 2, '10': 1, '+Inf': 1}
+        )
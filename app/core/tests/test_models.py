@@ -1,7 +1,9 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from core import models
-from unittest.mock import patch
+from django.core.files.base import ContentFile
+from core.storage import image_storage
+import hashlib
 
 
 def sample_user(email="test@gmail.com", password='testpass123'):
@@ -78,12 +80,15 @@ class MeodelTests(TestCase):
         )
         self.assertEqual(str(recipe), recipe.title)
 
-    @patch('uuid.uuid4')
-    def test_recipe_file_name_uuid(self, mock_uuid):
-        """Test that image is saved in the correct location"""
-        uuid = 'test-uuid'
-        mock_uuid.return_value = uuid
-        file_path = models.recipe_image_file_path(None, 'myimage.jpg')
+    def test_recipe_file_name_hash(self):
+        """Test that image is saved under a hash of its content"""
+        content = ContentFile(b'image content')
+        digest = hashlib.sha256(b'image content').hexdigest()
 
-        exp_path = f'uploads/recipe/{uuid}.jpg'
-        self.assertEqual(file_path, exp_path)
+        file_path = models.recipe_image_file_path(None, 'myimage.JPG')
+        name = image_storage.save(file_path, content)
+        self.addCleanup(image_storage.delete, name)
+
+        exp_path = f'uploads/incoming/{digest[:2]}/{digest}.jpg'
+        self.assertEqual(name, exp_path)
+        self.assertEqual(image_storage.save(file_path, content), exp_path)
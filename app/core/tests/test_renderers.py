@@ -0,0 +1,97 @@
+import datetime
+import io
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+DATA = OrderedDict([
+    ('id', 1),
+    ('price', Decimal('10.50')),
+    ('created', datetime.datetime(
+        2020, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc
+    )),
+    ('day', datetime.date(2020, 1, 2)),
+    ('uuid', uuid.UUID('12345678-1234-5678-1234-567812345678')),
+    ('detail', gettext_lazy('Not found.')),
+    ('title', 'Crème brûlée    '),
+    ('counts', {1: 2}),
+    ('tags', [{'id': 1, 'name': None}, True, 1.5]),
+])
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    '''Test the fast JSON renderer matches DRF's JSON renderer'''
+
+    def test_same_output(self):
+        '''Test decimals, datetimes and other types render identically'''
+        self.assertEqual(
+            FastJSONRenderer().render(DATA), JSONRenderer().render(DATA)
+        )
+
+    def test_indent(self):
+        '''Test indented output is left to DRF'''
+        media_type = 'application/json; indent=4'
+        self.assertEqual(
+            FastJSONRenderer().render(DATA, media_type),
+            JSONRenderer().render(DATA, media_type)
+        )
+
+    def test_none(self):
+        '''Test an empty response body'''
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    @patch('core.renderers.orjson', None)
+    def test_fallback(self):
+        '''Test rendering without orjson installed'''
+        self.assertEqual(
+            FastJSONRenderer().render(DATA), JSONRenderer().render(DATA)
+        )
+
+
+class FastJSONParserTests(SimpleTestCase):
+    '''Test the fast JSON parser matches DRF's JSON parser'''
+
+    def parse(self, parser, body, encoding='utf-8'):
+        return parser.parse(
+            io.BytesIO(body), 'application/json', {'encoding': encoding}
+        )
+
+    def test_same_result(self):
+        '''Test documents parse identically'''
+        body = '{"title": "Crème", "price": 10.5, "tags": [1, 2]}'.encode()
+        self.assertEqual(
+            self.parse(FastJSONParser(), body),
+            self.parse(JSONParser(), body)
+        )
+
+    def test_other_encoding(self):
+        '''Test bodies in another declared charset are decoded'''
+        body = '{"title": "Crème"}'.encode('latin-1')
+        self.assertEqual(
+            self.parse(FastJSONParser(), body, 'latin-1'),
+            {'title': 'Crème'}
+        )
+
+    def test_invalid(self):
+        '''Test malformed documents raise a parse error'''
+        for body in (b'{"title": ', b'[NaN]', b'\xff'):
+            with self.assertRaises(ParseError):
+                self.parse(FastJSONParser(), body)
+
+    @patch('core.parsers.orjson', None)
+    def test_fallback(self):
+        '''Test parsing without orjson installed'''
+        self.assertEqual(
+            self.parse(FastJSONParser(), b'{"id": 1}'), {'id': 1}
+        )
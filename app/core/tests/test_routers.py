@@ -0,0 +1,103 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory, override_settings
+from rest_framework import exceptions
+from rest_framework.authtoken.models import Token
+
+from core.authentication import CachedTokenAuthentication, get_token_cache
+from core.middleware import ReplicaRoutingMiddleware
+from core.models import Recipe
+from core.routers import ReplicaRouter, replica_reads, primary_reads, \
+    is_pinned
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTests(TestCase):
+    '''Test routing reads to replicas'''
+
+    def setUp(self):
+        cache.clear()
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def test_reads_use_primary_by_default(self):
+        '''Test reads outside a request go to the primary'''
+        self.assertIsNone(self.router.db_for_read(Recipe))
+        self.assertEqual(self.router.db_for_write(Recipe), 'default')
+
+    def test_reads_use_replica_until_write(self):
+        '''Test a write sends the rest of the block to the primary'''
+        with replica_reads() as state:
+            self.assertEqual(self.router.db_for_read(Recipe), 'replica1')
+            with primary_reads():
+                self.assertIsNone(self.router.db_for_read(Recipe))
+
+            self.router.db_for_write(Recipe)
+
+            self.assertTrue(state.wrote)
+            self.assertIsNone(self.router.db_for_read(Recipe))
+        self.assertIsNone(self.router.db_for_read(Recipe))
+
+    @override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+    def test_reads_stay_on_one_replica(self):
+        '''Test every read in a block goes to the same replica'''
+        for _ in range(5):
+            with replica_reads():
+                used = {self.router.db_for_read(Recipe) for _ in range(20)}
+            self.assertEqual(len(used), 1)
+
+    def request(self, method, write=False):
+        '''Run a request through the middleware, returning the read db'''
+        used = []
+
+        def view(request):
+            used.append(self.router.db_for_read(Recipe))
+            if write:
+                self.router.db_for_write(Recipe)
+            return HttpResponse()
+
+        request = self.factory.generic(
+            method, '/api/recipe/recipes/', HTTP_AUTHORIZATION='Token abc'
+        )
+        ReplicaRoutingMiddleware(view)(request)
+        return used[0]
+
+    def test_middleware_read_your_writes(self):
+        '''Test a client reads from the primary right after writing'''
+        self.assertEqual(self.request('GET'), 'replica1')
+        self.assertIsNone(self.request('POST', write=True))
+
+        self.assertTrue(is_pinned('Token abc'))
+        self.assertIsNone(self.request('GET'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_middleware_without_replicas(self):
+        '''Test every read uses the primary when no replica is set up'''
+        self.assertIsNone(self.request('GET'))
+        self.request('POST', write=True)
+
+        self.assertFalse(is_pinned('Token abc'))
+
+    @patch('rest_framework.authentication.TokenAuthentication'
+           '.authenticate_credentials')
+    def test_new_token_falls_back_to_primary(self, authenticate):
+        '''Test a token missing from the replica is looked up again'''
+        user = get_user_model().objects.create_user(
+            'test@gmail.com', 'testpass123'
+        )
+        token = Token.objects.create(user=user)
+        get_token_cache().delete(token.key)
+        authenticate.side_effect = [
+            exceptions.AuthenticationFailed, (user, token)
+        ]
+
+        with replica_reads():
+            result = CachedTokenAuthentication().authenticate_credentials(
+                token.key
+            )
+
+        self.assertEqual(result[1], token)
+        self.assertEqual(authenticate.call_count, 2)
@@ -0,0 +1,58 @@
+import os
+import stat
+import threading
+
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.test import TestCase
+
+from core import images
+from core.storage import image_storage
+
+
+class ContentAddressedStorageTests(TestCase):
+    '''Test storing files by content'''
+
+    def test_overwrite(self):
+        '''Test overwriting replaces a file without leaving temporary ones'''
+        name = 'uploads/recipe/aa/variant.webp'
+        self.addCleanup(image_storage.delete, name)
+
+        image_storage.overwrite(name, ContentFile(b'old'))
+        image_storage.overwrite(name, ContentFile(b'new'))
+
+        with image_storage.open(name) as f:
+            self.assertEqual(f.read(), b'new')
+        self.assertEqual(image_storage.listdir('uploads/recipe/aa')[1],
+                         ['variant.webp'])
+        mode = os.stat(image_storage.path(name)).st_mode
+        self.assertTrue(mode & stat.S_IROTH)
+
+    def test_collect_waits_for_lock(self):
+        '''Test collecting a file waits for a transaction locking it'''
+        name = image_storage.save(
+            'uploads/recipe/image.jpg', ContentFile(b'image')
+        )
+        self.addCleanup(image_storage.delete, name)
+        locked = threading.Event()
+        events = []
+
+        def hold_lock():
+            try:
+                with transaction.atomic():
+                    images.lock_image(name)
+                    locked.set()
+                    threading.Event().wait(0.3)
+                    events.append('released')
+            finally:
+                connection.close()
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        locked.wait(5)
+        images.collect_orphans([name])
+        events.append('collected')
+        holder.join()
+
+        self.assertEqual(events, ['released', 'collected'])
+        self.assertFalse(image_storage.exists(name))
@@ -0,0 +1,144 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def rates(**rates):
+    """Override the throttle rates for a test"""
+    return override_settings(REST_FRAMEWORK=dict(
+        api_settings.user_settings, DEFAULT_THROTTLE_RATES=rates
+    ))
+
+
+def at(now):
+    """Freeze the clock the throttles read"""
+    return patch(
+        'core.throttling.SlidingWindowRateThrottle.timer', return_value=now
+    )
+
+
+class UserScopeThrottleTests(TestCase):
+    '''Test per user read, write and upload budgets on the recipe API'''
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com', 'testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @rates(reads='2/min', writes='1/min')
+    def test_scopes_have_separate_budgets(self):
+        '''Test reads across endpoints share a budget apart from writes'''
+        with at(60.0):
+            self.assertEqual(
+                self.client.get(RECIPE_URL).status_code, status.HTTP_200_OK
+            )
+            self.assertEqual(
+                self.client.get(TAGS_URL).status_code, status.HTTP_200_OK
+            )
+            res = self.client.get(RECIPE_URL)
+            self.assertEqual(
+                res.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+            )
+            self.assertIn('Retry-After', res)
+
+            res = self.client.post(INGREDIENTS_URL, {'name': 'Salt'})
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            res = self.client.post(INGREDIENTS_URL, {'name': 'Salt'})
+            self.assertEqual(
+                res.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+            )
+
+    @rates(reads='1/min')
+    def test_per_user(self):
+        '''Test one user's requests don't use up another's budget'''
+        other = APIClient()
+        other.force_authenticate(get_user_model().objects.create_user(
+            'other@gmail.com', 'testpass123'
+        ))
+        with at(60.0):
+            self.client.get(RECIPE_URL)
+            self.assertEqual(
+                other.get(RECIPE_URL).status_code, status.HTTP_200_OK
+            )
+
+    @rates(writes='5/min', **{'upload-image': '1/min'})
+    def test_upload_image_scope(self):
+        '''Test image uploads have their own budget'''
+        recipe = Recipe.objects.create(
+            user=self.user, title='Cake', time_minutes=5, price=1
+        )
+        url = reverse('recipe:recipe-upload-image', args=[recipe.id])
+        with at(60.0):
+            self.client.post(url, {'image': 'x'})
+            res = self.client.post(url, {'image': 'x'})
+            self.assertEqual(
+                res.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+            )
+            res = self.client.patch(
+                reverse('recipe:recipe-detail', args=[recipe.id]),
+                {'title': 'Pie'}
+            )
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @rates(reads='10/min')
+    def test_sliding_window(self):
+        '''Test the previous window counts in proportion to its overlap'''
+        with at(60.0):
+            for _ in range(10):
+                self.client.get(TAGS_URL)
+        # A quarter into the next window, 7.5 of the 10 still count.
+        with at(135.0):
+            for _ in range(2):
+                self.assertEqual(
+                    self.client.get(TAGS_URL).status_code, status.HTTP_200_OK
+                )
+            res = self.client.get(TAGS_URL)
+            self.assertEqual(
+                res.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+            )
+            # The next request fits once 7 of the 10 count: 3 seconds on.
+            self.assertEqual(res['Retry-After'], '3')
+        with at(138.0):
+            self.assertEqual(
+                self.client.get(TAGS_URL).status_code, status.HTTP_200_OK
+            )
+
+    @rates(reads=None)
+    def test_unlimited_scope(self):
+        '''Test a scope without a rate isn't throttled'''
+        for _ in range(5):
+            self.assertEqual(
+                self.client.get(TAGS_URL).status_code, status.HTTP_200_OK
+            )
+
+    @rates(reads='1/min')
+    def test_counter_evicted(self):
+        '''Test a refusal survives the counter being evicted meanwhile'''
+        with at(60.0):
+            self.client.get(TAGS_URL)
+            with patch.object(cache, 'decr', side_effect=ValueError):
+                res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @rates(reads='0/min')
+    def test_zero_rate_rejected(self):
+        '''Test a rate allowing no requests is a configuration error'''
+        with self.assertRaises(ImproperlyConfigured):
+            self.client.get(TAGS_URL)
@@ -0,0 +1,146 @@
+import hashlib
+import math
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """Rate throttle counting requests over a sliding window in a shared
+    cache
+
+    Each fixed window is a single counter bumped with the cache's atomic
+    `incr`, so concurrent workers never lose a count (unlike DRF's
+    throttles, which rewrite a list of timestamps on every request). The
+    rate over the last `duration` seconds is estimated from the current
+    window's count plus the previous window's, weighted by how much of it
+    the sliding window still covers. Refused requests aren't counted.
+
+    Rates are read from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] by scope;
+    a scope without a rate is not throttled.
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.THROTTLE_CACHE_ALIAS]
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def parse_rate(self, rate):
+        num_requests, duration = super().parse_rate(rate)
+        if num_requests is not None and num_requests < 1:
+            raise ImproperlyConfigured(
+                f'The {self.scope!r} throttle rate {rate!r} must allow at '
+                f'least one request; leave it empty to disable the scope.'
+            )
+        return num_requests, duration
+
+    def _incr(self, key):
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Keep both windows around while they count towards the rate.
+            if self.cache.add(key, 1, self.duration * 2):
+                return 1
+            return self.cache.incr(key)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        now = self.timer()
+        window, elapsed = divmod(now, self.duration)
+        self.key = f'{key}:{int(window)}'
+        current = self._incr(self.key)
+        previous = self.cache.get(f'{key}:{int(window) - 1}', 0)
+        weight = 1 - elapsed / self.duration
+        if previous * weight + current <= self.num_requests:
+            return True
+
+        try:
+            self.cache.decr(self.key)
+        except ValueError:
+            # The counter was evicted, so there's nothing to take back.
+            pass
+        current -= 1
+        if current < self.num_requests:
+            # Wait for the previous window to slide out far enough.
+            ratio = (self.num_requests - current - 1) / previous
+            self.wait_seconds = self.duration * (1 - ratio) - elapsed
+        else:
+            # Wait for the next window, then for this one to slide out.
+            ratio = min((self.num_requests - 1) / current, 1)
+            self.wait_seconds = \
+                self.duration - elapsed + self.duration * (1 - ratio)
+        return False
+
+    def wait(self):
+        # Rounded first so float error can't add a second.
+        return math.ceil(round(self.wait_seconds, 6))
+
+
+class IPRateThrottle(SlidingWindowRateThrottle):
+    """Throttle requests per client address"""
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope, 'ident': self.get_ident(request)
+        }
+
+
+class LoginIPThrottle(IPRateThrottle):
+    scope = 'login-ip'
+
+
+class SignupIPThrottle(IPRateThrottle):
+    scope = 'signup-ip'
+
+
+class LoginEmailThrottle(SlidingWindowRateThrottle):
+    """Throttle login attempts per account, whichever address they come from"""
+    scope = 'login-email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email') \
+            if hasattr(request.data, 'get') else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        ident = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class UserScopeThrottle(SlidingWindowRateThrottle):
+    """Throttle each user's requests per scope
+
+    The scope is the view's `throttle_scope` when it sets one (an @action
+    can pass it as a keyword), otherwise 'reads' for safe methods and
+    'writes' for the rest, so every view in a scope shares one budget per
+    user. Anonymous requests are counted per client address.
+    """
+
+    def __init__(self):
+        # The scope depends on the request, see allow_request().
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, 'throttle_scope', None) or (
+            'reads' if request.method in SAFE_METHODS else 'writes'
+        )
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
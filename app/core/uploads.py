@@ -0,0 +1,67 @@
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import exceptions, status
+from rest_framework.parsers import MultiPartParser
+
+
+class ImageTooLarge(exceptions.APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = _('Images may be at most {max_bytes} bytes.')
+    default_code = 'too_large'
+
+    def __init__(self):
+        super().__init__(self.default_detail.format(
+            max_bytes=settings.RECIPE_IMAGE_MAX_BYTES
+        ))
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """Upload handler streaming files to disk while hashing them
+
+    Every file goes to a temporary file whatever its size, so an upload
+    never sits in worker memory, and the upload is abandoned with a 413 as
+    soon as it passes RECIPE_IMAGE_MAX_BYTES. The finished file carries
+    the SHA-256 of its content as `content_hash`.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        # Leave room for the multipart framing and other fields.
+        if content_length > settings.RECIPE_IMAGE_MAX_BYTES + 64 * 1024:
+            raise ImageTooLarge()
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = TemporaryUploadedFile(
+            self.file_name, self.content_type, 0, self.charset,
+            self.content_type_extra
+        )
+        self.hash = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.RECIPE_IMAGE_MAX_BYTES:
+            self.file.close()
+            raise ImageTooLarge()
+        self.hash.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.content_hash = self.hash.hexdigest()
+        return self.file
+
+
+class ImageUploadParser(MultiPartParser):
+    """Multipart parser receiving files with ImageUploadHandler"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']
+        request._request.upload_handlers = [
+            ImageUploadHandler(request._request)
+        ]
+        return super().parse(stream, media_type, parser_context)
@@ -0,0 +1,58 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+KEY_PREFIX = 'recipe-api-version:'
+RECENT_KEY_PREFIX = 'recipe-api-changed:'
+
+
+def _cache():
+    return caches[settings.RECIPE_API_CACHE_ALIAS]
+
+
+def _new_version():
+    # Seeding from the clock means a version lost from the cache is never
+    # handed out again, so stale ETags can't match after an eviction.
+    return int(time.time() * 1000)
+
+
+def get_collection_version(user_id):
+    """Return the version of a user's recipes, tags and ingredients"""
+    key = KEY_PREFIX + str(user_id)
+    version = _cache().get(key)
+    if version is None:
+        version = _new_version()
+        _cache().add(key, version, None)
+        version = _cache().get(key, version)
+    return version
+
+
+def _bump(user_id):
+    key = KEY_PREFIX + str(user_id)
+    try:
+        _cache().incr(key)
+    except ValueError:
+        _cache().set(key, _new_version(), None)
+    if settings.DATABASE_REPLICAS:
+        _cache().set(
+            RECENT_KEY_PREFIX + str(user_id), 1,
+            settings.DATABASE_REPLICA_PIN_SECONDS
+        )
+
+
+def bump_collection_version(user_id):
+    """Record that one of a user's recipes, tags or ingredients changed
+
+    The version moves once the current transaction commits, so a request
+    seeing the new version can't read the rows from before the change.
+    """
+    transaction.on_commit(lambda: _bump(user_id))
+
+
+def changed_recently(user_id):
+    """Return True if a user's collection changed too recently for
+    replicas to have caught up"""
+    return bool(settings.DATABASE_REPLICAS) and \
+        bool(_cache().get(RECENT_KEY_PREFIX + str(user_id)))
@@ -0,0 +1,69 @@
+import logging
+import uuid
+
+from django.core.cache import caches
+from django.db import connections
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.authentication import CachedTokenAuthentication
+from core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class HealthView(APIView):
+    '''Liveness check, answering without touching any backing service'''
+    authentication_classes = ()
+    permission_classes = (permissions.AllowAny,)
+
+    def get(self, request):
+        return Response({'status': 'ok'})
+
+
+class ReadinessView(HealthView):
+    '''Readiness check, testing every database and the shared cache
+
+    Callers only see which checks failed; the errors are logged, as they
+    can reveal hosts and credentials.
+    '''
+
+    def get(self, request):
+        checks = {}
+        for alias in connections:
+            try:
+                with connections[alias].cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                checks[f'database:{alias}'] = 'ok'
+            except Exception:
+                logger.exception('Readiness check database:%s failed', alias)
+                checks[f'database:{alias}'] = 'failed'
+        # Memcached backends swallow connection errors, so only a value
+        # read back proves the cache is up.
+        token = uuid.uuid4().hex
+        try:
+            cache = caches['default']
+            cache.set('health:ready', token, 10)
+            if cache.get('health:ready') != token:
+                raise RuntimeError('value written could not be read back')
+            checks['cache:default'] = 'ok'
+        except Exception:
+            logger.exception('Readiness check cache:default failed')
+            checks['cache:default'] = 'failed'
+
+        ready = all(result == 'ok' for result in checks.values())
+        return Response(
+            checks,
+            status=status.HTTP_200_OK if ready
+            else status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+
+class MetricsView(APIView):
+    '''Return this process's request metrics histograms per view'''
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request):
+        return Response(registry.snapshot())
@@ -0,0 +1,34 @@
+"""
+gunicorn configuration for the production profile.
+
+Sizing: requests spend most of their time waiting on PostgreSQL, so each
+worker process runs several threads. Start with one worker per CPU core
+and four threads each, then tune with `manage.py loadtest --url`:
+
+ - raise WEB_THREADS while p99 latency holds and the CPU is not saturated;
+ - raise WEB_CONCURRENCY when the CPU is idle but requests queue;
+ - keep WEB_CONCURRENCY * WEB_THREADS (one persistent database connection
+   per thread) below PostgreSQL's max_connections across all containers.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+
+workers = int(
+    os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count())
+)
+threads = int(os.environ.get('WEB_THREADS', 4))
+worker_class = 'gthread'
+
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so slow leaks can't build up; the jitter
+# stops every worker restarting at the same moment.
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
@@ -0,0 +1,96 @@
+from django.db import transaction
+from core.counts import adjust_recipe_counts, refresh_recipe_counts
+from core.models import Tag, Ingredient, Recipe
+from core.search import update_search_vectors
+from core.versioning import bump_collection_version
+from recipe.filters import recipe_through
+
+
+def _get_or_create_by_name(model, user, names):
+    """Return a name to id map, bulk creating the names that are missing"""
+    ids = dict(
+        model.objects.filter(user=user, name__in=names)
+        .order_by().values_list('name', 'id')
+    )
+    missing = [name for name in names if name not in ids]
+    created = model.objects.bulk_create(
+        model(user=user, name=name) for name in missing
+    )
+    ids.update((obj.name, obj.id) for obj in created)
+    return ids
+
+
+def _link(relation, recipes, names_per_recipe, ids):
+    """Bulk insert the through rows linking recipes to tags or ingredients"""
+    through, column = recipe_through(relation)
+    through.objects.bulk_create(
+        through(recipe_id=recipe.id, **{column: ids[name]})
+        for recipe, names in zip(recipes, names_per_recipe)
+        for name in dict.fromkeys(names)
+    )
+
+
+def bulk_create_recipes(user, items):
+    """Create recipes with their ingredients and tags in one transaction
+
+    `items` is a list of validated `RecipeBulkItemSerializer` data. Every
+    table is written with a single multi-row INSERT, so the number of
+    queries doesn't grow with the number of recipes.
+    """
+    ingredients = [item.pop('ingredients', []) for item in items]
+    tags = [item.pop('tags', []) for item in items]
+
+    with transaction.atomic():
+        ingredient_ids = _get_or_create_by_name(
+            Ingredient, user, {name for names in ingredients for name in names}
+        )
+        tag_ids = _get_or_create_by_name(
+            Tag, user, {name for names in tags for name in names}
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(user=user, **item) for item in items
+        )
+        _link('ingredients', recipes, ingredients, ingredient_ids)
+        _link('tags', recipes, tags, tag_ids)
+        # bulk_create sends no signals, so index the new recipes and
+        # recount their tags and ingredients here.
+        update_search_vectors(recipe.id for recipe in recipes)
+        refresh_recipe_counts(Ingredient, ingredient_ids.values())
+        refresh_recipe_counts(Tag, tag_ids.values())
+    bump_collection_version(user.pk)
+
+    return recipes
+
+
+def set_recipe_links(recipe, links, created=False):
+    """Replace a recipe's tags and ingredients with the given ids
+
+    `links` maps 'tags' and/or 'ingredients' to a list of ids. Each
+    relation costs one query for its current ids (skipped for a recipe
+    just created), then one DELETE and one multi-row INSERT for the
+    difference. The counts, search vector and collection version are
+    updated here since no m2m_changed signals are sent.
+    """
+    changed = False
+    for relation, ids in links.items():
+        through, column = recipe_through(relation)
+        model = Recipe._meta.get_field(relation).related_model
+        rows = through.objects.filter(recipe_id=recipe.pk)
+        current = set() if created else \
+            set(rows.values_list(column, flat=True))
+        added = [pk for pk in dict.fromkeys(ids) if pk not in current]
+        removed = current.difference(ids)
+        if removed:
+            rows.filter(**{f'{column}__in': removed}).delete()
+            adjust_recipe_counts(model, removed, -1)
+        if added:
+            through.objects.bulk_create(
+                through(recipe_id=recipe.pk, **{column: pk}) for pk in added
+            )
+            adjust_recipe_counts(model, added, 1)
+        changed = changed or bool(added or removed)
+
+    if changed:
+        update_search_vectors([recipe.pk])
+        bump_collection_version(recipe.user_id)
+    return changed
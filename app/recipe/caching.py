@@ -0,0 +1,75 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.routers import primary_reads
+from core.versioning import changed_recently, get_collection_version
+
+KEY_PREFIX = 'recipe-api-response:'
+
+
+class ConditionalListMixin:
+    """Serve list responses with ETags and a per-user response cache
+
+    The ETag is derived from the user's collection version, which signals
+    bump whenever one of their recipes, tags or ingredients changes, once
+    the change commits. Lists are read from the primary until replicas have
+    had time to catch up with the latest change. A
+    matching If-None-Match gets a 304 and a cache hit is served as is, so
+    neither touches the recipe tables.
+    """
+
+    def _list_etag(self, request):
+        query = sorted(request.query_params.lists())
+        key = '{}:{}:{}:{}:{}'.format(
+            request.user.pk,
+            get_collection_version(request.user.pk),
+            request.get_host() + request.path,
+            query,
+            request.accepted_renderer.media_type,
+        )
+        return '"{}"'.format(hashlib.md5(key.encode()).hexdigest())
+
+    def _finalize_conditional(self, response, etag):
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        etag = self._list_etag(request)
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        if etag in [tag.strip() for tag in if_none_match.split(',')]:
+            return self._finalize_conditional(
+                Response(status=status.HTTP_304_NOT_MODIFIED), etag
+            )
+
+        cache = caches[settings.RECIPE_API_CACHE_ALIAS]
+        key = KEY_PREFIX + etag
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return self._finalize_conditional(
+                HttpResponse(content, content_type=content_type), etag
+            )
+
+        if changed_recently(request.user.pk):
+            # Replicas may not have the change behind the current version
+            # yet, and what's read now is cached under it.
+            with primary_reads():
+                response = super().list(request, *args, **kwargs)
+        else:
+            response = super().list(request, *args, **kwargs)
+        response.add_post_render_callback(
+            lambda r: cache.set(
+                key,
+                (r.content, r['Content-Type']),
+                settings.RECIPE_API_CACHE_TIMEOUT
+            )
+        )
+        return self._finalize_conditional(response, etag)
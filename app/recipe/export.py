@@ -0,0 +1,72 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import prefetch_related_objects
+
+from core.renderers import dumps
+
+CSV_FIELDS = (
+    'id', 'title', 'time_minutes', 'price', 'link', 'ingredients', 'tags',
+)
+
+
+def _chunks(queryset, chunk_size):
+    """Yield lists of recipes read through a server-side cursor"""
+    chunk = []
+    for recipe in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(recipe)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def export_rows(queryset, chunk_size):
+    """Yield a dict per recipe, prefetching tags and ingredients per chunk
+
+    Only one chunk of recipes is held in memory at a time, however large
+    the queryset is.
+    """
+    for chunk in _chunks(queryset, chunk_size):
+        prefetch_related_objects(chunk, 'ingredients', 'tags')
+        for recipe in chunk:
+            yield {
+                'id': recipe.id,
+                'title': recipe.title,
+                'time_minutes': recipe.time_minutes,
+                'price': recipe.price,
+                'link': recipe.link,
+                'ingredients': [i.name for i in recipe.ingredients.all()],
+                'tags': [t.name for t in recipe.tags.all()],
+            }
+
+
+def ndjson_lines(rows):
+    """Render rows as newline delimited JSON"""
+    default = DjangoJSONEncoder().default
+    for row in rows:
+        yield dumps(row, default=default) + b'\n'
+
+
+class _Echo:
+    """File-like object that returns what is written to it"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    """Render rows as CSV, joining ingredient and tag names with ';'"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_FIELDS)
+    for row in rows:
+        row['ingredients'] = ';'.join(row['ingredients'])
+        row['tags'] = ';'.join(row['tags'])
+        yield writer.writerow([row[field] for field in CSV_FIELDS])
+
+
+EXPORT_FORMATS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv'),
+}
@@ -0,0 +1,161 @@
+from collections import defaultdict
+
+from django.db import models
+from rest_framework.serializers import ListSerializer
+
+from recipe import serializers
+from recipe.filters import recipe_through
+
+
+def _scalar_getter(field):
+    """Return a function reading a model field's output from a row"""
+    column = field.attname
+    if isinstance(field, models.DecimalField):
+        # DRF's DecimalField output; PostgreSQL already returns the value
+        # at the column's scale.
+        return lambda row: None if row[column] is None \
+            else '{:f}'.format(row[column])
+    return lambda row: row[column]
+
+
+class FastSerializer:
+    """Read-only serializer building the output of `base` from `.values()`
+
+    It reproduces the JSON of a ModelSerializer for list and retrieve
+    responses without instantiating models or running DRF's per-field
+    machinery: `trim_queryset` turns the queryset into `.values()` rows of
+    the columns needed, and `data` converts the rows with getters compiled
+    once per response. Many to many fields are loaded with one query per
+    relation over the through table. Subclasses implement any
+    SerializerMethodField as a `get_<name>(row)` method reading the
+    columns listed in `base.field_columns`.
+    """
+    base = None
+
+    def __init__(self, instance=None, many=False, context=None, **kwargs):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+        request = self.context.get('request')
+        self.fields = self._fields(request)
+        self.expanded = self._expanded(request)
+
+    @classmethod
+    def _fields(cls, request):
+        if request is not None and hasattr(cls.base, 'requested_fields'):
+            requested = cls.base.requested_fields(request)
+            return [f for f in cls.base.Meta.fields if f in requested]
+        return list(cls.base.Meta.fields)
+
+    @classmethod
+    def _expanded(cls, request):
+        if request is not None and hasattr(cls.base, 'expanded_fields'):
+            return cls.base.expanded_fields(request)
+        return set()
+
+    @classmethod
+    def trim_queryset(cls, queryset, request):
+        """Return `.values()` rows of the columns the output reads"""
+        model = queryset.model
+        field_columns = getattr(cls.base, 'field_columns', {})
+        columns = ['id']
+        for name in cls._fields(request):
+            if name in field_columns:
+                columns.extend(field_columns[name])
+                continue
+            field = model._meta.get_field(name)
+            if not field.many_to_many:
+                columns.append(field.attname)
+        return queryset.values(*dict.fromkeys(columns))
+
+    def _nested_fields(self, name):
+        """Return the nested serializer class for a relation, or None"""
+        declared = self.base._declared_fields.get(name)
+        if isinstance(declared, ListSerializer):
+            return type(declared.child)
+        if name in self.expanded:
+            return self.base.expandable[name]
+        return None
+
+    def _related(self, name, ids):
+        """Map each recipe id to the output of a many to many relation"""
+        through, column = recipe_through(name)
+        target = column[:-len('_id')]
+        related_model = self.base.Meta.model._meta.get_field(name) \
+            .related_model
+        links = through.objects.filter(recipe_id__in=ids).order_by(*(
+            f'-{target}__{o[1:]}' if o.startswith('-') else f'{target}__{o}'
+            for o in serializers.related_ordering(related_model)
+        ))
+
+        related = defaultdict(list)
+        nested = self._nested_fields(name)
+        if nested is None:
+            for recipe_id, target_id in links.values_list('recipe_id', column):
+                related[recipe_id].append(target_id)
+            return related
+
+        opts = nested.Meta.model._meta
+        names = list(nested.Meta.fields)
+        lookups = [f'{target}__{opts.get_field(f).attname}' for f in names]
+        for recipe_id, *values in links.values_list('recipe_id', *lookups):
+            related[recipe_id].append(dict(zip(names, values)))
+        return related
+
+    def _compile(self, rows):
+        """Return (name, getter) pairs producing each output field"""
+        model = self.base.Meta.model
+        field_columns = getattr(self.base, 'field_columns', {})
+        ids = [row['id'] for row in rows]
+        getters = []
+        for name in self.fields:
+            if name in field_columns:
+                getters.append((name, getattr(self, f'get_{name}')))
+                continue
+            field = model._meta.get_field(name)
+            if field.many_to_many:
+                related = self._related(name, ids)
+                getters.append(
+                    (name, lambda row, r=related: r.get(row['id'], []))
+                )
+            else:
+                getters.append((name, _scalar_getter(field)))
+        return getters
+
+    @property
+    def data(self):
+        rows = self.instance if self.many else [self.instance]
+        rows = list(rows)
+        getters = self._compile(rows)
+        data = [
+            {name: getter(row) for name, getter in getters} for row in rows
+        ]
+        return data if self.many else data[0]
+
+
+class FastRecipeSerializer(FastSerializer):
+    """Fast-path output of RecipeSerializer"""
+    base = serializers.RecipeSerializer
+
+    def get_thumbnail(self, row):
+        return serializers.variant_url(
+            self.context.get('request'),
+            row['image'],
+            row['image_status'],
+            'thumbnail'
+        )
+
+
+class FastRecipeDetailSerializer(FastRecipeSerializer):
+    """Fast-path output of RecipeDetailSerializer"""
+    base = serializers.RecipeDetailSerializer
+
+
+class FastTagSerializer(FastSerializer):
+    """Fast-path output of TagSerializer"""
+    base = serializers.TagSerializer
+
+
+class FastIngredientSerializer(FastSerializer):
+    """Fast-path output of IngredientSerializer"""
+    base = serializers.IngredientSerializer
@@ -0,0 +1,28 @@
+from django.db.models import Count
+from core.models import Recipe
+
+
+def recipe_through(relation):
+    """Return the through model and its target column for a recipe M2M"""
+    field = Recipe._meta.get_field(relation)
+    through = field.remote_field.through
+    return through, f'{field.related_model._meta.model_name}_id'
+
+
+def filter_recipes_by_related(queryset, relation, ids, match_all=False):
+    """Filter recipes linked to the given tag or ingredient ids
+
+    Filters on a subquery over the through table instead of joining it, so
+    PostgreSQL plans a semi-join and a recipe is returned once however many
+    of the ids it matches. With `match_all` a recipe must be linked to every
+    id, otherwise any one of them will do.
+    """
+    through, column = recipe_through(relation)
+    ids = set(ids)
+    links = through.objects.filter(**{f'{column}__in': ids})
+    if match_all:
+        links = links.order_by().values('recipe_id').annotate(
+            matched=Count('*')
+        ).filter(matched=len(ids))
+
+    return queryset.filter(pk__in=links.values('recipe_id'))
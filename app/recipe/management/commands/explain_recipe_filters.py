@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from benchmark.seed import seed_user
+from core.models import Recipe, Tag
+from recipe.filters import filter_recipes_by_related
+
+BENCHMARK_EMAIL = 'filter-benchmark@example.com'
+
+
+class Command(BaseCommand):
+    """Compare query plans of the JOIN and semi-join recipe tag filters"""
+    help = (
+        'Seed a benchmark user with recipes and print EXPLAIN ANALYZE for '
+        'the legacy JOIN + DISTINCT tag filter and the semi-join filters.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1000000)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--tags-per-recipe', type=int, default=4)
+        parser.add_argument('--filter-tags', type=int, default=3)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        user = self._seed(options)
+        tag_ids = list(
+            Tag.objects.filter(user=user).values_list('id', flat=True)
+        )[:options['filter_tags']]
+        recipes = Recipe.objects.filter(user=user).order_by('-id')
+
+        plans = (
+            ('JOIN + DISTINCT',
+             recipes.filter(tags__id__in=tag_ids).distinct()),
+            ('Semi-join (match any)',
+             filter_recipes_by_related(recipes, 'tags', tag_ids)),
+            ('Semi-join (match all)',
+             filter_recipes_by_related(
+                 recipes, 'tags', tag_ids, match_all=True)),
+        )
+        for title, queryset in plans:
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            self.stdout.write(self._explain(queryset[:50]))
+
+    def _seed(self, options):
+        """Create the benchmark user and data unless it already exists"""
+        user, created = get_user_model().objects.get_or_create(
+            email=BENCHMARK_EMAIL
+        )
+        self.stdout.write('Seeding recipes...')
+        seed_user(
+            user,
+            options['recipes'],
+            tags=options['tags'],
+            ingredients=0,
+            tags_per_recipe=options['tags_per_recipe'],
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return user
+
+    def _explain(self, queryset):
+        """Return the EXPLAIN ANALYZE output for a queryset"""
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
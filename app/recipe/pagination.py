@@ -0,0 +1,37 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Keyset pagination for recipes, ordered by the primary key, or by
+    rank for searches.
+
+    Pagination is opt-in: responses are only paginated when the client
+    sends either the `cursor` or the `page_size` query parameter, so
+    existing clients keep getting a plain list.
+    """
+    ordering = '-id'
+    page_size = settings.RECIPE_API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.RECIPE_API_MAX_PAGE_SIZE
+
+    def get_page_size(self, request):
+        """Return the page size, or None when pagination isn't requested"""
+        params = request.query_params
+        if self.cursor_query_param not in params and \
+                self.page_size_query_param not in params:
+            return None
+        return super().get_page_size(request)
+
+    def get_ordering(self, request, queryset, view):
+        if 'rank' in queryset.query.annotations:
+            return ('-rank', '-id')
+        return super().get_ordering(request, queryset, view)
+
+
+class RecipeAttrCursorPagination(RecipeCursorPagination):
+    """Keyset pagination for tags and ingredients, in the view's ordering"""
+    ordering = ('-name', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        return view.get_ordering()
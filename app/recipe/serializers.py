@@ -1,51 +1,334 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import MANY_RELATION_KWARGS
+from core.images import attach_image, inspect_image, variant_name
 from core.models import Tag, Ingredient, Recipe
+from recipe.bulk import set_recipe_links
+
+
+def variant_url(request, image, image_status, variant):
+    """Return the URL of a processed variant of an image name, or None"""
+    if not image or image_status != Recipe.IMAGE_READY:
+        return None
+    url = default_storage.url(variant_name(image, variant))
+    return request.build_absolute_uri(url) if request else url
+
+
+def image_variant_url(serializer, recipe, variant):
+    """Return the URL of a processed image variant, or None"""
+    return variant_url(
+        serializer.context.get('request'),
+        recipe.image.name,
+        recipe.image_status,
+        variant
+    )
+
+
+def related_ordering(model):
+    """Return the order in which a recipe's tags or ingredients are listed
+
+    The model's default ordering, with the id breaking ties so prefetched
+    and fast-path output always agree.
+    """
+    return tuple(model._meta.ordering) + ('id',)
 
 
 class TagSerializer(serializers.ModelSerializer):
     '''Serializer for Tags objects '''
     class Meta:
         model = Tag
-        fields = ('id', 'name', 'user',)
-        read_only_fields = ('id', )
+        fields = ('id', 'name', 'user', 'recipe_count')
+        read_only_fields = ('id', 'recipe_count')
 
 
 class IngredientSerializer(serializers.ModelSerializer):
     '''Serializer for Ingredients objects'''
     class Meta:
         model = Ingredient
-        fields = ('id', 'name',)
-        read_only_fields = ('id',)
+        fields = ('id', 'name', 'recipe_count')
+        read_only_fields = ('id', 'recipe_count')
+
+
+class BatchedManyRelatedField(serializers.ManyRelatedField):
+    """Many related field resolving the whole list of ids in one query
+
+    Every id that is malformed or doesn't exist is reported at once. The
+    validated value is the list of ids, without duplicates, rather than
+    model instances.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        queryset = child.get_queryset()
+        pk_field = queryset.model._meta.pk
+        pks, errors = [], []
+        for item in data:
+            try:
+                # to_python would take True as 1 and truncate 1.5 to 1.
+                if isinstance(item, bool) or \
+                        isinstance(item, float) and not item.is_integer():
+                    raise TypeError
+                pks.append(pk_field.to_python(item))
+            except (TypeError, DjangoValidationError):
+                errors.append(child.error_messages['incorrect_type'].format(
+                    data_type=type(item).__name__
+                ))
+        pks = list(dict.fromkeys(pks))
+        if not errors and pks:
+            found = set(queryset.filter(pk__in=pks).order_by()
+                        .values_list('pk', flat=True))
+            errors = [
+                child.error_messages['does_not_exist'].format(pk_value=pk)
+                for pk in pks if pk not in found
+            ]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return pks
+
+
+class UserPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field accepting only objects of the requesting user
+
+    With many=True the ids are validated together by a
+    BatchedManyRelatedField.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BatchedManyRelatedField(**list_kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is None:
+            return queryset.none()
+        return queryset.filter(user=request.user)
+
+
+def _split_param(request, param):
+    """Return the set of comma separated names in a query parameter"""
+    value = request.query_params.get(param, '')
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """Serializer mixin for the ?fields= and ?expand= query parameters
+
+    On reads, `fields` limits the output to the listed fields and `expand`
+    replaces related ids with nested objects for the relations in
+    `expandable`. `trim_queryset` loads only the columns and relations
+    the requested fields need.
+    """
+    expandable = {}
+    # Model columns read by fields that aren't columns themselves.
+    field_columns = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+
+        for name in self.expanded_fields(request):
+            self.fields[name] = self.expandable[name](
+                many=True, read_only=True
+            )
+        fields = self.requested_fields(request)
+        for name in set(self.fields) - fields:
+            self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, request):
+        """Return the fields to output, rejecting unknown names"""
+        fields = _split_param(request, 'fields')
+        if not fields:
+            return set(cls.Meta.fields)
+        unknown = fields - set(cls.Meta.fields)
+        if unknown:
+            raise serializers.ValidationError({
+                'fields': 'Unknown fields: {}.'.format(
+                    ', '.join(sorted(unknown)))
+            })
+        return fields
 
+    @classmethod
+    def expanded_fields(cls, request):
+        """Return the relations to nest, rejecting unknown names"""
+        expand = _split_param(request, 'expand')
+        unknown = expand - set(cls.expandable)
+        if unknown:
+            raise serializers.ValidationError({
+                'expand': 'Cannot expand: {}.'.format(
+                    ', '.join(sorted(unknown)))
+            })
+        return expand
 
-class RecipeSerializer(serializers.ModelSerializer):
+    @classmethod
+    def trim_queryset(cls, queryset, request):
+        """Select only the columns and prefetch only the relations the
+        requested fields read"""
+        model = queryset.model
+        expanded = cls.expanded_fields(request)
+        columns = {'id'}
+        for name in cls.requested_fields(request):
+            field = model._meta.get_field(name) \
+                if name not in cls.field_columns else None
+            if field is not None and field.many_to_many:
+                related = field.related_model.objects.order_by(
+                    *related_ordering(field.related_model)
+                )
+                nested = isinstance(
+                    cls._declared_fields.get(name), serializers.BaseSerializer
+                )
+                if not nested and name not in expanded:
+                    # Only the ids are output.
+                    related = related.only('id')
+                queryset = queryset.prefetch_related(
+                    Prefetch(name, queryset=related)
+                )
+            elif field is not None:
+                columns.add(field.attname)
+            else:
+                columns.update(cls.field_columns[name])
+        return queryset.only(*columns)
+
+
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serialize a recipe"""
-    ingredients = serializers.PrimaryKeyRelatedField(
+    ingredients = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Ingredient.objects.all()
     )
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
+    thumbnail = serializers.SerializerMethodField()
+
+    expandable = {
+        'ingredients': IngredientSerializer,
+        'tags': TagSerializer,
+    }
+    field_columns = {'thumbnail': ('image', 'image_status')}
 
     class Meta:
         model = Recipe
         fields = (
             'id', 'title', 'ingredients', 'tags', 'time_minutes', 'price',
-            'link',
+            'link', 'thumbnail',
         )
         read_only_fields = ('id',)
 
+    def get_thumbnail(self, obj):
+        return image_variant_url(self, obj, 'thumbnail')
+
+    def _pop_links(self, validated_data):
+        return {
+            name: validated_data.pop(name)
+            for name in ('ingredients', 'tags') if name in validated_data
+        }
+
+    def create(self, validated_data):
+        links = self._pop_links(validated_data)
+        with transaction.atomic():
+            recipe = super().create(validated_data)
+            set_recipe_links(recipe, links, created=True)
+        return recipe
+
+    def update(self, instance, validated_data):
+        links = self._pop_links(validated_data)
+        # Saving the recipe first locks its row, so concurrent updates of
+        # the same recipe diff its links one after the other.
+        with transaction.atomic():
+            recipe = super().update(instance, validated_data)
+            set_recipe_links(recipe, links)
+        return recipe
+
 
 class RecipeDetailSerializer(RecipeSerializer):
     ingredients = IngredientSerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
 
 
+class UploadedImageField(serializers.FileField):
+    """Image field checking uploads from their header only
+
+    Unlike ImageField it never decodes the image, so it can refuse
+    decompression bombs; the image is fully verified when it's processed.
+    """
+    default_error_messages = {
+        'invalid_image': serializers.ImageField.default_error_messages[
+            'invalid_image'
+        ],
+    }
+
+    def to_internal_value(self, data):
+        file = super().to_internal_value(data)
+        try:
+            inspect_image(file)
+        except ValueError:
+            self.fail('invalid_image')
+        return file
+
+
 class RecipeImageSerializer(serializers.ModelSerializer):
     """Serializer for uploading images to recipe"""
+    image = UploadedImageField()
+    image_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'image')
-        read_only_fields = ('id',)
+        fields = ('id', 'image', 'image_status', 'image_variants')
+        read_only_fields = ('id', 'image_status')
+
+    def get_image_variants(self, obj):
+        return {
+            variant: image_variant_url(self, obj, variant)
+            for variant in settings.RECIPE_IMAGE_VARIANTS
+        }
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Uploads aren't served until processed, see core.media.
+        if instance.image_status != Recipe.IMAGE_READY:
+            data['image'] = None
+        return data
+
+    def update(self, instance, validated_data):
+        return attach_image(instance, validated_data['image'])
+
+
+class RecipeBulkItemSerializer(serializers.ModelSerializer):
+    """Serializer for one recipe in a bulk import
+
+    Ingredients and tags are given by name and created for the user when
+    they don't exist yet.
+    """
+    ingredients = serializers.ListField(
+        child=serializers.CharField(max_length=200),
+        required=False
+    )
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        required=False
+    )
+
+    class Meta:
+        model = Recipe
+        fields = (
+            'title', 'ingredients', 'tags', 'time_minutes', 'price', 'link',
+        )
@@ -0,0 +1,99 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class FastSerializerParityTests(TestCase):
+    '''Test fast-path serializers render exactly what DRF renders'''
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('Vegan', 'Dessert', 'Dessert', 'Quick')
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('Salt', 'Flour', 'Sugar')
+        ]
+        self.recipes = []
+        for i, price in enumerate(('0.50', '10.00', '999.99', '7.10')):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=i * 10,
+                price=price,
+                link='https://example.com' if i % 2 else '',
+            )
+            recipe.tags.add(*tags[i:])
+            recipe.ingredients.add(*ingredients[:i])
+            self.recipes.append(recipe)
+        Recipe.objects.filter(pk=self.recipes[0].pk).update(
+            image='uploads/recipe/a.jpg', image_status=Recipe.IMAGE_READY
+        )
+        Recipe.objects.filter(pk=self.recipes[1].pk).update(
+            image='uploads/recipe/b.jpg', image_status=Recipe.IMAGE_PENDING
+        )
+
+    def assertParity(self, url, params=None):
+        '''Assert both serializers produce the same response body'''
+        responses = []
+        for enabled in (False, True):
+            cache.clear()
+            with override_settings(RECIPE_API_FAST_SERIALIZERS=enabled):
+                responses.append(self.client.get(url, params or {}))
+
+        self.assertEqual(responses[0].status_code, 200)
+        self.assertEqual(responses[0].content, responses[1].content)
+
+    def test_recipe_list(self):
+        '''Test recipe lists match, with and without pagination'''
+        self.assertParity(RECIPES_URL)
+        self.assertParity(RECIPES_URL, {'page_size': 2})
+        self.assertParity(RECIPES_URL, {'search': 'recipe'})
+
+    def test_recipe_list_sparse(self):
+        '''Test sparse and expanded recipe lists match'''
+        self.assertParity(RECIPES_URL, {'fields': 'id,title,price'})
+        self.assertParity(RECIPES_URL, {'fields': 'thumbnail,tags'})
+        self.assertParity(RECIPES_URL, {'expand': 'tags,ingredients'})
+
+    def test_recipe_detail(self):
+        '''Test recipe details match'''
+        for recipe in self.recipes:
+            self.assertParity(detail_url(recipe.id))
+        self.assertParity(
+            detail_url(self.recipes[3].id), {'fields': 'title,tags'}
+        )
+
+    def test_tag_and_ingredient_lists(self):
+        '''Test tag and ingredient lists match'''
+        for url in (TAGS_URL, INGREDIENTS_URL):
+            self.assertParity(url)
+            self.assertParity(url, {'assigned_only': 1})
+            self.assertParity(url, {'ordering': 'most_used'})
+            self.assertParity(url, {'page_size': 2})
+
+    def test_recipe_detail_not_found(self):
+        '''Test a missing recipe is still a 404'''
+        res = self.client.get(detail_url(0))
+
+        self.assertEqual(res.status_code, 404)
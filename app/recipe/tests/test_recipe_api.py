@@ -1,16 +1,27 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from unittest.mock import patch
 from rest_framework.test import APIClient
 from rest_framework import status
+from core.images import run_next_job, variant_name
 from core.models import Recipe, Tag, Ingredient
 from django.contrib.auth import get_user_model
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+from recipe.pagination import RecipeCursorPagination
 from django.urls import reverse
+import csv
+import json
 import os
 from PIL import Image
 import tempfile
 
 
 RECIPE_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+EXPORT_URL = reverse('recipe:recipe-export')
 
 
 def image_upload_url(recipe_id):
@@ -108,6 +119,68 @@ class PrivateAPITests(TestCase):
         self.assertEqual(res.data, serializer.data)
         self.assertEqual(len(res.data), len(serializer.data))
 
+    def test_list_recipes_query_count(self):
+        '''Test listing recipes costs a constant number of queries'''
+        for i in range(5):
+            recipe = sample_recipe(user=self.user, title=f'Recipe {i}')
+            recipe.tags.add(sample_tag(user=self.user, name=f'tag{i}'))
+            recipe.ingredients.add(
+                sample_ingredient(user=self.user, name=f'ingredient{i}')
+            )
+
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 5)
+
+    def test_recipe_detail_query_count(self):
+        '''Test retrieving a recipe prefetches its tags and ingredients'''
+        recipe = sample_recipe(user=self.user)
+        recipe.tags.add(sample_tag(user=self.user, name='tag1'))
+        recipe.tags.add(sample_tag(user=self.user, name='tag2'))
+        recipe.ingredients.add(sample_ingredient(user=self.user))
+
+        with self.assertNumQueries(3):
+            res = self.client.get(recipe_detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 2)
+
+    def test_list_recipes_cursor_pagination(self):
+        '''Test recipes are paginated by cursor when a page size is given'''
+        recipes = [
+            sample_recipe(user=self.user, title=f'Recipe {i}')
+            for i in range(5)
+        ]
+
+        res = self.client.get(RECIPE_URL, {'page_size': 3})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [r.id for r in reversed(recipes[2:])]
+        )
+        self.assertIsNone(res.data['previous'])
+
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [r.id for r in reversed(recipes[:2])]
+        )
+        self.assertIsNone(res.data['next'])
+
+    def test_list_recipes_page_size_capped(self):
+        '''Test the requested page size is capped'''
+        for i in range(3):
+            sample_recipe(user=self.user, title=f'Recipe {i}')
+
+        with patch.object(RecipeCursorPagination, 'max_page_size', 2):
+            res = self.client.get(RECIPE_URL, {'page_size': 100})
+
+        self.assertEqual(len(res.data['results']), 2)
+
     def test_create_basic_recipe(self):
         """Test creating recipe"""
         payload = {
@@ -243,9 +316,64 @@ class RecipeImageUploadTests(TestCase):
 
         self.recipe.refresh_from_db()
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn('image', res.data)
+        self.assertIsNone(res.data['image'])
+        self.assertEqual(res.data['image_status'], Recipe.IMAGE_PENDING)
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    def test_upload_processed_image_served(self):
+        """Test the image URL is given once the image is processed"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (10, 10)).save(ntf, format='JPEG')
+            for _ in range(2):
+                ntf.seek(0)
+                res = self.client.post(
+                    url, {'image': ntf}, format='multipart'
+                )
+                run_next_job()
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(res.data['image_status'], Recipe.IMAGE_READY)
+        self.assertEqual(
+            self.client.get(res.data['image']).status_code,
+            status.HTTP_200_OK
+        )
+        for variant in settings.RECIPE_IMAGE_VARIANTS:
+            default_storage.delete(
+                variant_name(self.recipe.image.name, variant)
+            )
+
+    def test_upload_image_too_large(self):
+        """Test uploads over the size limit are refused"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (10, 10)).save(ntf, format='JPEG')
+            ntf.write(b'\0' * 2048)
+            ntf.seek(0)
+            with self.settings(RECIPE_IMAGE_MAX_BYTES=1024):
+                res = self.client.post(
+                    url, {'image': ntf}, format='multipart'
+                )
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(
+            res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+        self.assertFalse(self.recipe.image)
+
+    def test_upload_image_too_many_pixels(self):
+        """Test images declaring too many pixels are refused"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (10, 10)).save(ntf, format='JPEG')
+            ntf.seek(0)
+            with self.settings(RECIPE_IMAGE_MAX_PIXELS=99):
+                res = self.client.post(
+                    url, {'image': ntf}, format='multipart'
+                )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_upload_image_bad_request(self):
         """Test uploading an invalid image"""
         url = image_upload_url(self.recipe.id)
@@ -296,3 +424,435 @@ class RecipeImageUploadTests(TestCase):
         self.assertIn(serializer1.data, res.data)
         self.assertIn(serializer2.data, res.data)
         self.assertNotIn(serializer3.data, res.data)
+
+    def test_filter_recipes_by_tags_unique(self):
+        """Test a recipe matching several tags is returned once"""
+        recipe = sample_recipe(user=self.user, title='Vegan curry')
+        tag1 = sample_tag(user=self.user, name='Vegan')
+        tag2 = sample_tag(user=self.user, name='Curry')
+        recipe.tags.add(tag1, tag2)
+
+        res = self.client.get(
+            RECIPE_URL,
+            {'tags': '{},{}'.format(tag1.id, tag2.id)}
+        )
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]['id'], recipe.id)
+
+    def test_filter_recipes_by_all_tags(self):
+        """Test returning recipes that have every requested tag"""
+        recipe1 = sample_recipe(user=self.user, title='Vegan curry')
+        recipe2 = sample_recipe(user=self.user, title='Vegan salad')
+        tag1 = sample_tag(user=self.user, name='Vegan')
+        tag2 = sample_tag(user=self.user, name='Curry')
+        recipe1.tags.add(tag1, tag2)
+        recipe2.tags.add(tag1)
+
+        res = self.client.get(
+            RECIPE_URL,
+            {'tags': '{},{}'.format(tag1.id, tag2.id), 'tags_match': 'all'}
+        )
+
+        self.assertEqual([r['id'] for r in res.data], [recipe1.id])
+
+
+class RecipeBulkCreateTests(TestCase):
+    '''Test the bulk recipe create endpoint'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testpass123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_recipes(self):
+        """Test creating recipes with ingredient and tag names"""
+        existing = sample_tag(user=self.user, name='Vegan')
+        payload = [
+            {
+                'title': 'Thai curry',
+                'time_minutes': 30,
+                'price': 10.00,
+                'tags': ['Vegan', 'Thai'],
+                'ingredients': ['Rice', 'Coconut milk'],
+            },
+            {
+                'title': 'Rice pudding',
+                'time_minutes': 40,
+                'price': 4.00,
+                'ingredients': ['Rice', 'Rice'],
+            },
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 2)
+        curry = Recipe.objects.get(id=res.data[0]['id'])
+        pudding = Recipe.objects.get(id=res.data[1]['id'])
+        self.assertEqual(curry.user, self.user)
+        self.assertIn(existing, curry.tags.all())
+        self.assertEqual(curry.tags.count(), 2)
+        self.assertEqual(
+            sorted(i.name for i in curry.ingredients.all()),
+            ['Coconut milk', 'Rice']
+        )
+        self.assertEqual(pudding.ingredients.count(), 1)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(), 2
+        )
+
+    def test_bulk_create_query_count(self):
+        """Test the number of queries doesn't grow with the payload"""
+        payload = [
+            {
+                'title': f'Recipe {i}',
+                'time_minutes': 10,
+                'price': 5.00,
+                'tags': [f'tag {i}'],
+                'ingredients': [f'ingredient {i}'],
+            }
+            for i in range(20)
+        ]
+
+        with self.assertNumQueries(12):
+            res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Recipe.objects.count(), 20)
+
+    def test_bulk_create_invalid_item(self):
+        """Test nothing is created if any recipe is invalid"""
+        payload = [
+            {'title': 'Valid', 'time_minutes': 10, 'price': 5.00},
+            {'title': 'Invalid'},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0]['errors'], {})
+        self.assertIn('price', res.data[1]['errors'])
+        self.assertFalse(Recipe.objects.exists())
+
+
+class RecipeExportTests(TestCase):
+    '''Test the streaming recipe export endpoint'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testpass123'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipes = []
+        for i in range(3):
+            recipe = sample_recipe(user=self.user, title=f'Recipe {i}')
+            recipe.tags.add(sample_tag(user=self.user, name=f'tag {i}'))
+            recipe.ingredients.add(
+                sample_ingredient(user=self.user, name=f'ingredient {i}')
+            )
+            self.recipes.append(recipe)
+
+    def test_export_ndjson(self):
+        """Test exporting recipes as NDJSON across several chunks"""
+        with self.settings(RECIPE_EXPORT_CHUNK_SIZE=2):
+            res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        rows = [
+            json.loads(line)
+            for line in b''.join(res.streaming_content).splitlines()
+        ]
+        self.assertEqual(
+            [row['id'] for row in rows],
+            [recipe.id for recipe in reversed(self.recipes)]
+        )
+        self.assertEqual(rows[0]['tags'], ['tag 2'])
+        self.assertEqual(rows[0]['ingredients'], ['ingredient 2'])
+        self.assertEqual(rows[0]['price'], '30.00')
+
+    def test_export_csv(self):
+        """Test exporting recipes as CSV"""
+        res = self.client.get(EXPORT_URL, {'output': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        rows = list(csv.DictReader(lines))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['title'], 'Recipe 2')
+        self.assertEqual(rows[0]['tags'], 'tag 2')
+
+    def test_export_invalid_output(self):
+        """Test an unknown export format is rejected"""
+        res = self.client.get(EXPORT_URL, {'output': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@patch('django.db.transaction.on_commit', lambda func: func())
+class RecipeSearchTests(TestCase):
+    '''Test full-text search over recipes'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testpass123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def search(self, text):
+        res = self.client.get(RECIPE_URL, {'search': text})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [r['id'] for r in res.data]
+
+    def test_search_title_prefix(self):
+        """Test searching recipe titles by word prefix"""
+        curry = sample_recipe(user=self.user, title='Chicken curry')
+        sample_recipe(user=self.user, title='Beef stew')
+
+        self.assertEqual(self.search('chick'), [curry.id])
+        self.assertEqual(self.search('chicken cur'), [curry.id])
+        self.assertEqual(self.search('chicken stew'), [])
+
+    def test_search_ingredients_and_tags(self):
+        """Test recipes are indexed when ingredients and tags change"""
+        recipe = sample_recipe(user=self.user, title='Dinner')
+        ingredient = sample_ingredient(user=self.user, name='Paprika')
+        recipe.ingredients.add(ingredient)
+        recipe.tags.add(sample_tag(user=self.user, name='Spicy'))
+
+        self.assertEqual(self.search('paprika'), [recipe.id])
+        self.assertEqual(self.search('spicy'), [recipe.id])
+
+        recipe.ingredients.remove(ingredient)
+        self.assertEqual(self.search('paprika'), [])
+
+    def test_search_deleted_tag(self):
+        """Test recipes are reindexed when a tag is deleted"""
+        recipe = sample_recipe(user=self.user, title='Dinner')
+        tag = sample_tag(user=self.user, name='Lemon')
+        recipe.tags.add(tag)
+        self.assertEqual(self.search('lemon'), [recipe.id])
+
+        tag.delete()
+
+        self.assertEqual(self.search('lemon'), [])
+
+    def test_search_ranks_title_matches_first(self):
+        """Test title matches rank above tag matches"""
+        tagged = sample_recipe(user=self.user, title='Salad')
+        tagged.tags.add(sample_tag(user=self.user, name='Lemon'))
+        titled = sample_recipe(user=self.user, title='Lemon tart')
+
+        self.assertEqual(self.search('lemon'), [titled.id, tagged.id])
+
+    def test_search_paginated_by_rank(self):
+        """Test paginated search results keep their ranking"""
+        for title in ('Salad', 'Lemon tart', 'Lemon lemon cake', 'Soup'):
+            recipe = sample_recipe(user=self.user, title=title)
+            recipe.tags.add(sample_tag(user=self.user, name='Lemon'))
+        expected = self.search('lemon')
+
+        ids = []
+        params = {'search': 'lemon', 'page_size': 1}
+        url = RECIPE_URL
+        while url:
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids.extend(r['id'] for r in res.data['results'])
+            url, params = res.data['next'], None
+
+        self.assertEqual(len(expected), 4)
+        self.assertEqual(ids, expected)
+
+    def test_search_bulk_created_recipes(self):
+        """Test recipes created in bulk are searchable"""
+        payload = [{
+            'title': 'Pancakes',
+            'time_minutes': 10,
+            'price': 2.00,
+            'ingredients': ['Buttermilk'],
+        }]
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(self.search('buttermilk'), [res.data[0]['id']])
+
+
+class RecipeSparseFieldsTests(TestCase):
+    '''Test choosing recipe fields with ?fields= and ?expand='''
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(user=self.user, title='Pancakes')
+        self.tag = sample_tag(user=self.user, name='Breakfast')
+        self.recipe.tags.add(self.tag)
+
+    def test_list_fields(self):
+        '''Test only the requested fields are selected and returned'''
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPE_URL, {'fields': 'id,title,price'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data, [{'id': self.recipe.id, 'title': 'Pancakes',
+                        'price': '30.00'}]
+        )
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('"core_recipe"."link"', sql)
+        self.assertNotIn('core_recipe_tags', sql)
+
+    def test_list_expand(self):
+        '''Test expanding tags nests them in the list'''
+        res = self.client.get(
+            RECIPE_URL, {'fields': 'id,tags', 'expand': 'tags'}
+        )
+
+        self.assertEqual(res.data[0]['tags'][0]['name'], 'Breakfast')
+        self.assertEqual(set(res.data[0]), {'id', 'tags'})
+
+    def test_detail_fields(self):
+        '''Test the detail view honours ?fields='''
+        res = self.client.get(
+            recipe_detail_url(self.recipe.id), {'fields': 'title,tags'}
+        )
+
+        self.assertEqual(res.data['title'], 'Pancakes')
+        self.assertEqual(res.data['tags'][0]['name'], 'Breakfast')
+        self.assertNotIn('price', res.data)
+
+    def test_unknown_fields(self):
+        '''Test unknown fields and expansions are rejected'''
+        res = self.client.get(RECIPE_URL, {'fields': 'id,secret'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(RECIPE_URL, {'expand': 'user'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_fields_ignored_on_write(self):
+        '''Test ?fields= doesn't restrict the fields that can be written'''
+        payload = {
+            'title': 'Waffles', 'time_minutes': 10, 'price': '4.00',
+            'tags': [self.tag.id], 'ingredients': [],
+        }
+        res = self.client.post(f'{RECIPE_URL}?fields=id', payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Recipe.objects.get(title='Waffles').time_minutes, 10)
+
+
+class RecipeRelatedIdsTests(TestCase):
+    '''Test writing a recipe's tags and ingredients by id'''
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.ingredients = [
+            sample_ingredient(user=self.user, name=f'Ingredient {i}')
+            for i in range(40)
+        ]
+        self.tag = sample_tag(user=self.user)
+
+    def create(self, ingredients):
+        return self.client.post(RECIPE_URL, {
+            'title': 'Stew', 'time_minutes': 60, 'price': '8.00',
+            'tags': [self.tag.id],
+            'ingredients': [i.id for i in ingredients],
+        }, format='json')
+
+    def test_create_queries_constant(self):
+        '''Test the number of queries doesn't grow with the ids'''
+        with CaptureQueriesContext(connection) as one:
+            self.create(self.ingredients[:1])
+        with CaptureQueriesContext(connection) as forty:
+            res = self.create(self.ingredients)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(one), len(forty))
+        self.assertEqual(
+            Recipe.objects.get(id=res.data['id']).ingredients.count(), 40
+        )
+        self.ingredients[0].refresh_from_db()
+        self.assertEqual(self.ingredients[0].recipe_count, 2)
+
+    def test_missing_ids_reported(self):
+        '''Test every unknown or other user's id is reported at once'''
+        other = get_user_model().objects.create_user(
+            'other@gmail.com', 'testpass123'
+        )
+        others = sample_ingredient(user=other)
+        res = self.client.post(RECIPE_URL, {
+            'title': 'Stew', 'time_minutes': 60, 'price': '8.00',
+            'tags': [],
+            'ingredients': [self.ingredients[0].id, others.id, 99999, 'x'],
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data['ingredients']), 1)
+
+        res = self.client.post(RECIPE_URL, {
+            'title': 'Stew', 'time_minutes': 60, 'price': '8.00',
+            'tags': [],
+            'ingredients': [self.ingredients[0].id, others.id, 99999],
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data['ingredients']), 2)
+        self.assertIn(str(others.id), res.data['ingredients'][0])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_non_integer_ids_rejected(self):
+        '''Test booleans and fractional numbers aren't taken as ids'''
+        first = self.ingredients[0].id
+        for value in (True, first + 0.5):
+            res = self.client.post(RECIPE_URL, {
+                'title': 'Stew', 'time_minutes': 60, 'price': '8.00',
+                'tags': [],
+                'ingredients': [value],
+            }, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('Incorrect type', res.data['ingredients'][0])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_update_diffs_links(self):
+        '''Test updating writes only the difference and keeps counts'''
+        res = self.create(self.ingredients[:3])
+        url = recipe_detail_url(res.data['id'])
+
+        res = self.client.patch(url, {
+            'ingredients': [self.ingredients[2].id, self.ingredients[3].id],
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(res.data['ingredients']),
+            [self.ingredients[2].id, self.ingredients[3].id]
+        )
+        counts = dict(
+            Ingredient.objects.filter(recipe_count__gt=0)
+            .values_list('id', 'recipe_count')
+        )
+        self.assertEqual(
+            counts, {self.ingredients[2].id: 1, self.ingredients[3].id: 1}
+        )
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 1)
+        res = self.client.get(RECIPE_URL, {'search': 'ingredient'})
+        self.assertEqual(len(res.data), 1)
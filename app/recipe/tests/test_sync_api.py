@@ -0,0 +1,135 @@
+import datetime
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import images, sync
+from core.tests.test_images import sample_image
+from core.models import Recipe, Tag, Ingredient, Tombstone
+
+SYNC_URL = reverse('sync')
+
+
+@override_settings(SYNC_OVERLAP_SECONDS=0)
+class SyncApiTests(TestCase):
+    '''Test incremental sync of recipes, tags and ingredients'''
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user, name='Tofu'
+        )
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Stir fry', time_minutes=10, price=5
+        )
+        other = get_user_model().objects.create_user(
+            'other@gmail.com', 'testpass123'
+        )
+        Tag.objects.create(user=other, name='Secret')
+
+    def test_full_sync(self):
+        '''Test a sync without a token returns every row of the user'''
+        res = self.client.get(SYNC_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data['full'])
+        self.assertEqual([r['id'] for r in res.data['recipes']],
+                         [self.recipe.id])
+        self.assertEqual([t['name'] for t in res.data['tags']], ['Vegan'])
+        self.assertEqual(len(res.data['ingredients']), 1)
+        self.assertTrue(res.data['token'])
+
+    def test_incremental_sync(self):
+        '''Test only rows changed or deleted since the token are returned'''
+        token = self.client.get(SYNC_URL).data['token']
+        res = self.client.get(SYNC_URL, {'since': token})
+        self.assertFalse(res.data['full'])
+        self.assertEqual(res.data['recipes'], [])
+        self.assertEqual(res.data['tags'], [])
+
+        self.recipe.tags.add(self.tag)
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        salt_id = salt.id
+        salt.delete()
+        res = self.client.get(SYNC_URL, {'since': token})
+
+        self.assertEqual(res.data['recipes'][0]['tags'], [self.tag.id])
+        self.assertEqual(res.data['tags'][0]['recipe_count'], 1)
+        self.assertEqual(res.data['ingredients'], [])
+        self.assertEqual(res.data['deleted']['ingredients'], [salt_id])
+
+        token = res.data['token']
+        recipe_id = self.recipe.id
+        self.recipe.delete()
+        res = self.client.get(SYNC_URL, {'since': token})
+
+        self.assertEqual(res.data['deleted']['recipes'], [recipe_id])
+        self.assertEqual(res.data['tags'][0]['recipe_count'], 0)
+
+    def test_deduplicated_image(self):
+        '''Test a recipe sharing an already processed image is synced'''
+        other = Recipe.objects.create(
+            user=self.user, title='Curry', time_minutes=10, price=5
+        )
+        content = sample_image()
+        images.attach_image(self.recipe, ContentFile(content, 'a.jpg'))
+        images.run_next_job()
+        token = self.client.get(SYNC_URL).data['token']
+
+        images.attach_image(other, ContentFile(content, 'b.jpg'))
+        res = self.client.get(SYNC_URL, {'since': token})
+
+        self.assertEqual([r['id'] for r in res.data['recipes']], [other.id])
+        self.assertIsNotNone(res.data['recipes'][0]['thumbnail'])
+        other.refresh_from_db()
+        for variant in settings.RECIPE_IMAGE_VARIANTS:
+            images.image_storage.delete(
+                images.variant_name(other.image.name, variant)
+            )
+        other.image.delete()
+
+    def test_invalid_token(self):
+        '''Test malformed tokens are rejected'''
+        for token in ('abc', '-1', '9' * 30):
+            res = self.client.get(SYNC_URL, {'since': token})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_token(self):
+        '''Test a token older than the tombstones gets a full sync'''
+        token = sync.make_token(timezone.now() - datetime.timedelta(days=90))
+
+        res = self.client.get(SYNC_URL, {'since': token})
+
+        self.assertTrue(res.data['full'])
+        self.assertEqual(len(res.data['recipes']), 1)
+
+    def test_prune_tombstones(self):
+        '''Test expired tombstones are deleted'''
+        self.tag.delete()
+        self.recipe.delete()
+        Tombstone.objects.filter(kind='tag').update(
+            deleted_at=timezone.now() - datetime.timedelta(days=90)
+        )
+        out = StringIO()
+
+        call_command('prune_tombstones', stdout=out)
+
+        self.assertIn('Pruned 1', out.getvalue())
+        self.assertEqual(
+            list(Tombstone.objects.values_list('kind', flat=True)),
+            ['recipe']
+        )
@@ -1,9 +1,13 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from unittest.mock import patch
 
 from rest_framework import status
+from rest_framework.response import Response
 from rest_framework.test import APIClient
+from core.routers import reading_from_replicas
 from recipe.serializers import TagSerializer
 from core.models import Tag, Recipe
 
@@ -60,6 +64,23 @@ class PrivateTagsApiTests(TestCase):
         self.assertEqual(len(res.data), 1)
         self.assertEqual(res.data[0]['name'], tag.name)
 
+    def test_retrieve_tags_paginated(self):
+        """Test tags are paginated by name when a page size is given"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        Tag.objects.create(user=self.user, name='Dessert')
+        Tag.objects.create(user=self.user, name='Breakfast')
+
+        res = self.client.get(TAGS_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [t['name'] for t in res.data['results']], ['Vegan', 'Dessert']
+        )
+        res = self.client.get(res.data['next'])
+        self.assertEqual(
+            [t['name'] for t in res.data['results']], ['Breakfast']
+        )
+
     # def test_create_tag_successful(self):
     #     """Test creating a new tag"""
     #     payload = {'name': 'Test tag'}
@@ -88,6 +109,7 @@ class PrivateTagsApiTests(TestCase):
             user=self.user,
         )
         recipe.tags.add(tag1)
+        tag1.refresh_from_db()
 
         res = self.client.get(TAGS_URL, {'assigned_only': 1})
 
@@ -117,3 +139,124 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.get(TAGS_URL, {'assigned_only': 1})
 
         self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]['recipe_count'], 2)
+
+    def test_retrieve_tags_most_used(self):
+        """Test ordering tags by the number of recipes using them"""
+        tag1 = Tag.objects.create(user=self.user, name='Breakfast')
+        tag2 = Tag.objects.create(user=self.user, name='Vegan')
+        tag3 = Tag.objects.create(user=self.user, name='Dessert')
+        for title in ('Pancakes', 'Porridge'):
+            recipe = Recipe.objects.create(
+                title=title, time_minutes=5, price=3.00, user=self.user
+            )
+            recipe.tags.add(tag1, tag3 if title == 'Pancakes' else tag2)
+        recipe.tags.add(tag3)
+
+        res = self.client.get(TAGS_URL, {'ordering': 'most_used'})
+
+        self.assertEqual(
+            [tag['id'] for tag in res.data], [tag3.id, tag1.id, tag2.id]
+        )
+
+
+@patch('django.db.transaction.on_commit', lambda func: func())
+class ConditionalTagsApiTests(TestCase):
+    """Test ETags and cached responses on the tags list"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@londonappdev.com',
+            'password123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Tag.objects.create(user=self.user, name='Vegan')
+
+    def test_not_modified(self):
+        """Test an unchanged list answers 304 without any queries"""
+        res = self.client.get(TAGS_URL)
+        etag = res['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_cached_response(self):
+        """Test a repeated request is served from the cache"""
+        first = self.client.get(TAGS_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(TAGS_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+
+    def test_change_invalidates(self):
+        """Test changing a tag or recipe gives a new ETag"""
+        etag = self.client.get(TAGS_URL)['ETag']
+        Tag.objects.create(user=self.user, name='Dessert')
+
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 2)
+        self.assertNotEqual(res['ETag'], etag)
+
+        etag = res['ETag']
+        recipe = Recipe.objects.create(
+            title='Pancakes', time_minutes=5, price=3.00, user=self.user
+        )
+        self.assertNotEqual(self.client.get(TAGS_URL)['ETag'], etag)
+        etag = self.client.get(TAGS_URL)['ETag']
+        recipe.tags.add(Tag.objects.get(name='Vegan'))
+        self.assertNotEqual(self.client.get(TAGS_URL)['ETag'], etag)
+
+    def test_change_invalidates_on_commit(self):
+        """Test the ETag only changes once the change commits"""
+        etag = self.client.get(TAGS_URL)['ETag']
+        callbacks = []
+
+        with patch('django.db.transaction.on_commit', callbacks.append):
+            Tag.objects.create(user=self.user, name='Dessert')
+            res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        for callback in callbacks:
+            callback()
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_recent_change_read_from_primary(self):
+        """Test lists are read from the primary right after a change"""
+        used = []
+
+        def list_recording_router(view, request, *args, **kwargs):
+            used.append(reading_from_replicas())
+            return Response([])
+
+        with patch('rest_framework.mixins.ListModelMixin.list',
+                   list_recording_router):
+            self.client.get(TAGS_URL)
+            Tag.objects.create(user=self.user, name='Dessert')
+            self.client.get(TAGS_URL)
+
+        self.assertEqual(used, [True, False])
+
+    def test_etag_per_user(self):
+        """Test another user's list doesn't share the cached response"""
+        etag = self.client.get(TAGS_URL)['ETag']
+        user2 = get_user_model().objects.create_user(
+            'other@londonappdev.com',
+            'testpass'
+        )
+        self.client.force_authenticate(user2)
+
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
@@ -1,29 +1,66 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from core import sync
+from core.authentication import CachedTokenAuthentication
+from core.metrics import SerializerTimingMixin
+from core.routers import primary_reads
+from core.throttling import UserScopeThrottle
+from core.uploads import ImageUploadParser
+from core.search import search_recipes
 from core.models import Tag, Ingredient, Recipe
-from recipe import serializers
+from recipe import fast, serializers
+from recipe.bulk import bulk_create_recipes
+from recipe.caching import ConditionalListMixin
+from recipe.export import EXPORT_FORMATS, export_rows
+from recipe.filters import filter_recipes_by_related
+from recipe.pagination import RecipeCursorPagination, \
+    RecipeAttrCursorPagination
 
 
-class BaseRecipeAttrViewSet(viewsets.GenericViewSet,
+class BaseRecipeAttrViewSet(SerializerTimingMixin,
+                            ConditionalListMixin,
+                            viewsets.GenericViewSet,
                             mixins.ListModelMixin,
                             mixins.CreateModelMixin):
     """Base viewset for user owned recipe attributes"""
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    throttle_classes = (UserScopeThrottle,)
+    pagination_class = RecipeAttrCursorPagination
+
+    def get_ordering(self):
+        """Return the list ordering, most used first with
+        ?ordering=most_used"""
+        if self.request.query_params.get('ordering') == 'most_used':
+            return ('-recipe_count', '-id')
+        return ('-name', '-id')
 
     def get_queryset(self):
         """Return objects for current user"""
         assigned_only = bool(self.request.query_params.get('assigned_only'))
         queryset = self.queryset
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            queryset = queryset.filter(recipe_count__gt=0)
+        if self.action == 'list' and settings.RECIPE_API_FAST_SERIALIZERS:
+            queryset = self.fast_serializer_class.trim_queryset(
+                queryset, self.request
+            )
 
         return queryset.filter(
             user=self.request.user
-        ).order_by('-name').distinct()
+        ).order_by(*self.get_ordering())
+
+    def get_serializer_class(self):
+        """Return the fast-path serializer for lists"""
+        if self.action == 'list' and settings.RECIPE_API_FAST_SERIALIZERS:
+            return self.fast_serializer_class
+        return self.serializer_class
 
     def perform_create(self, serializer):
         """Create a new ingredient"""
@@ -34,52 +71,84 @@ class TagViewSet(BaseRecipeAttrViewSet):
     """Manage tags in the database"""
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    fast_serializer_class = fast.FastTagSerializer
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
     """Manage ingredients in the database"""
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
+    fast_serializer_class = fast.FastIngredientSerializer
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(SerializerTimingMixin,
+                    ConditionalListMixin,
+                    viewsets.ModelViewSet):
     """Manage recipes in the database"""
     serializer_class = serializers.RecipeSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    throttle_classes = (UserScopeThrottle,)
+    # Set per action, see UserScopeThrottle.
+    throttle_scope = None
+    pagination_class = RecipeCursorPagination
 
     def _params_to_ints(self, qs):
         """Convert a list of string IDs to a list of integers"""
         return [int(str_id) for str_id in qs.split(',')]
 
+    def _match_all(self, param):
+        """Return True if the filter for param should match every id"""
+        return self.request.query_params.get(f'{param}_match') == 'all'
+
     def get_queryset(self):
         """Retrieve the recipes for the authenticated user"""
-        tags = self.request.query_params.get('tags')
-        ingredients = self.request.query_params.get('ingredients')
         queryset = self.queryset
-        if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
-        if ingredients:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+        for relation in ('tags', 'ingredients'):
+            ids = self.request.query_params.get(relation)
+            if ids:
+                queryset = filter_recipes_by_related(
+                    queryset,
+                    relation,
+                    self._params_to_ints(ids),
+                    match_all=self._match_all(relation)
+                )
+        if self.action in ('list', 'retrieve'):
+            queryset = self.get_serializer_class().trim_queryset(
+                queryset, self.request
+            )
+        else:
+            queryset = queryset.defer('search_vector')
+        queryset = queryset.filter(user=self.request.user).order_by('-id')
 
-        return queryset.filter(user=self.request.user)
+        search = self.request.query_params.get('search')
+        if search:
+            queryset = search_recipes(queryset, search)
+        return queryset
 
     def get_serializer_class(self):
         """Return appropriate serializer class"""
+        if settings.RECIPE_API_FAST_SERIALIZERS:
+            if self.action == 'list':
+                return fast.FastRecipeSerializer
+            elif self.action == 'retrieve':
+                return fast.FastRecipeDetailSerializer
         if self.action == 'retrieve':
             return serializers.RecipeDetailSerializer
         elif self.action == 'upload_image':
             return serializers.RecipeImageSerializer
+        elif self.action == 'bulk':
+            return serializers.RecipeBulkItemSerializer
         return self.serializer_class
 
     def perform_create(self, serializer):
         '''Create a new recipe'''
         serializer.save(user=self.request.user)
 
-    @action(methods=['POST'], detail=True, url_path='upload-image')
+    @action(methods=['POST'], detail=True, url_path='upload-image',
+            throttle_scope='upload-image',
+            parser_classes=(ImageUploadParser,))
     def upload_image(self, request, pk=None):
         """Upload an image to a recipe"""
         recipe = self.get_object()
@@ -99,3 +168,112 @@ class RecipeViewSet(viewsets.ModelViewSet):
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
+
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        """Create a list of recipes in a single transaction"""
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {'detail': 'Expected a list of recipes.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > settings.RECIPE_BULK_MAX_ITEMS:
+            return Response(
+                {'detail': 'At most {} recipes can be created at once.'
+                 .format(settings.RECIPE_BULK_MAX_ITEMS)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        item_serializers = [self.get_serializer(data=item) for item in items]
+        if not all([s.is_valid() for s in item_serializers]):
+            return Response(
+                [{'errors': s.errors} for s in item_serializers],
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        recipes = bulk_create_recipes(
+            request.user,
+            [s.validated_data for s in item_serializers]
+        )
+        return Response(
+            [{'id': recipe.id} for recipe in recipes],
+            status=status.HTTP_201_CREATED
+        )
+
+    @action(methods=['GET'], detail=False, url_path='export')
+    def export(self, request):
+        """Stream the user's recipes as NDJSON or CSV"""
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {'detail': 'Output must be one of: {}.'.format(
+                    ', '.join(EXPORT_FORMATS))},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        render, content_type = EXPORT_FORMATS[output]
+        queryset = self.get_queryset()
+        # The body is streamed after the middleware has returned, so pick
+        # the database (possibly a replica) while routing still applies.
+        rows = export_rows(
+            queryset.using(queryset.db),
+            settings.RECIPE_EXPORT_CHUNK_SIZE
+        )
+        response = StreamingHttpResponse(
+            render(rows),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = \
+            f'attachment; filename="recipes.{output}"'
+        return response
+
+
+class SyncView(APIView):
+    """Return the user's recipes, tags and ingredients changed since a sync
+    token
+
+    Without ?since=, or with a token older than the tombstone retention,
+    every row is returned with "full" set and clients replace their copy.
+    Otherwise only rows changed since the token are returned, along with
+    the ids deleted since. Deleting a tag or ingredient doesn't mark its
+    recipes as changed, so clients drop deleted ids from their recipes.
+    The returned token is passed as ?since= on the next sync.
+    """
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    throttle_classes = (UserScopeThrottle,)
+    sync_models = (
+        ('recipes', Recipe, fast.FastRecipeSerializer),
+        ('tags', Tag, fast.FastTagSerializer),
+        ('ingredients', Ingredient, fast.FastIngredientSerializer),
+    )
+
+    def get(self, request):
+        now = timezone.now()
+        since = request.query_params.get('since')
+        if since is not None:
+            try:
+                since = sync.parse_token(since)
+            except (ValueError, OverflowError, OSError):
+                return Response(
+                    {'since': 'Invalid sync token.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        full = since is None or since < sync.tombstone_horizon()
+
+        data = {'token': sync.make_token(now), 'full': full}
+        # A replica may not have caught up with the token's point in time.
+        with primary_reads():
+            for name, model, serializer_class in self.sync_models:
+                queryset = model.objects.filter(user=request.user) \
+                    .order_by('id')
+                if not full:
+                    queryset = sync.changed_since(queryset, since)
+                rows = serializer_class.trim_queryset(queryset, request)
+                data[name] = serializer_class(
+                    list(rows), many=True, context={'request': request}
+                ).data
+            data['deleted'] = {} if full else \
+                sync.deleted_since(request.user, since)
+        return Response(data)
@@ -1,6 +1,7 @@
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 
 
 from rest_framework.test import APIClient
@@ -19,6 +20,7 @@ class PublicUsersAPITests(TestCase):
     '''Test users api public'''
 
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
 
     def test_create_valid_user_success(self):
@@ -0,0 +1,115 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+CREATE_USER_URL = reverse('users:create')
+TOKEN_URL = reverse('users:token')
+
+
+def rates(**rates):
+    """Override the throttle rates for a test"""
+    return override_settings(REST_FRAMEWORK=dict(
+        api_settings.user_settings, DEFAULT_THROTTLE_RATES=rates
+    ))
+
+
+class LoginThrottlingTests(TestCase):
+    '''Test rate limiting logins and signups'''
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        get_user_model().objects.create_user(
+            'test@londonappdev.com', 'pass1234'
+        )
+
+    @rates(**{'login-email': '2/min'})
+    def test_throttle_per_email(self):
+        '''Test attempts on one account are limited from any address'''
+        payload = {'email': 'Test@londonappdev.com', 'password': 'wrong'}
+        for address in ('10.0.0.1', '10.0.0.2'):
+            res = self.client.post(TOKEN_URL, payload, REMOTE_ADDR=address)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        payload['email'] = 'test@londonappdev.com '
+        payload['password'] = 'pass1234'
+        res = self.client.post(TOKEN_URL, payload, REMOTE_ADDR='10.0.0.3')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(res['Retry-After']), 0)
+
+        res = self.client.post(
+            TOKEN_URL, {'email': 'other@londonappdev.com', 'password': 'x'}
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @rates(**{'login-ip': '2/min'})
+    def test_throttle_per_ip(self):
+        '''Test attempts from one address are limited across accounts'''
+        for i in range(2):
+            res = self.client.post(
+                TOKEN_URL, {'email': f'{i}@londonappdev.com', 'password': 'x'}
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(
+            TOKEN_URL, {'email': 'test@londonappdev.com', 'password': 'x'}
+        )
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        res = self.client.post(
+            TOKEN_URL,
+            {'email': 'test@londonappdev.com', 'password': 'pass1234'},
+            REMOTE_ADDR='10.0.0.9'
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @rates(**{'login-ip': '2/min'})
+    def test_forged_forwarded_for_ignored(self):
+        '''Test clients can't dodge the address limit with X-Forwarded-For'''
+        for i in range(3):
+            res = self.client.post(
+                TOKEN_URL,
+                {'email': f'{i}@londonappdev.com', 'password': 'x'},
+                HTTP_X_FORWARDED_FOR=f'10.1.0.{i}'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @rates(**{'signup-ip': '1/min'})
+    def test_throttle_signup(self):
+        '''Test signups from one address are limited'''
+        res = self.client.post(CREATE_USER_URL, {
+            'email': 'a@londonappdev.com', 'password': 'pass1234', 'name': 'a'
+        })
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.post(CREATE_USER_URL, {
+            'email': 'b@londonappdev.com', 'password': 'pass1234', 'name': 'b'
+        })
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @rates(**{'login-ip': '1/min'})
+    def test_window_slides(self):
+        '''Test the allowance returns once the window slides past'''
+        payload = {'email': 'test@londonappdev.com', 'password': 'pass1234'}
+
+        def post_at(now):
+            with patch('core.throttling.SlidingWindowRateThrottle.timer',
+                       return_value=now):
+                return self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(post_at(120.0).status_code, status.HTTP_200_OK)
+        res = post_at(120.0)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '120')
+        self.assertEqual(
+            post_at(180.0).status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertEqual(post_at(240.0).status_code, status.HTTP_200_OK)
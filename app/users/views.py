@@ -1,25 +1,51 @@
 
 from users.serializers import UserSerializer, AuthTokenSerializer
-from rest_framework import generics, permissions, authentication
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import exceptions, generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
+from core.authentication import CachedTokenAuthentication
+from core.hashers import PasswordHashingBusy, shed_hashing_load
+from core.metrics import SerializerTimingMixin
+from core.throttling import (
+    LoginEmailThrottle, LoginIPThrottle, SignupIPThrottle
+)
 
 
-class CreateUserView(generics.CreateAPIView):
+class PasswordHashingThrottled(exceptions.Throttled):
+    default_detail = _('Too many password checks in progress.')
+
+
+class HashingLoadSheddingMixin:
+    '''Answer 429 instead of waiting when the hashing pool is full'''
+
+    def dispatch(self, request, *args, **kwargs):
+        with shed_hashing_load():
+            return super().dispatch(request, *args, **kwargs)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, PasswordHashingBusy):
+            exc = PasswordHashingThrottled(wait=1)
+        return super().handle_exception(exc)
+
+
+class CreateUserView(HashingLoadSheddingMixin, generics.CreateAPIView):
     '''Create a new user in the system'''
     serializer_class = UserSerializer
+    throttle_classes = (SignupIPThrottle,)
 
 
-class CreateTokenView(ObtainAuthToken):
+class CreateTokenView(HashingLoadSheddingMixin, ObtainAuthToken):
     '''Create a new auth token for user '''
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = (LoginIPThrottle, LoginEmailThrottle)
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(SerializerTimingMixin, generics.RetrieveUpdateAPIView):
     '''Manage authenticated user'''
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):